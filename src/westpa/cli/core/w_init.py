@@ -85,6 +85,23 @@ def entry_point():
     args = parser.parse_args()
     westpa.rc.process_args(args)
     work_managers.environment.process_wm_args(args)
+
+    initialize(
+        args.tstates,
+        args.tstate_file,
+        args.bstates,
+        args.bstate_file,
+        segs_per_state=args.segs_per_state,
+        shotgun=args.shotgun,
+    )
+
+
+def initialize(tstates, tstate_file, bstates, bstate_file, segs_per_state=1, shotgun=False):
+    '''Initialize a new WEST simulation as configured in ``westpa.rc``. Basis states are given as
+    'label,probability[,auxref]' strings in ``bstates`` and/or read from ``bstate_file``; target states
+    are given as 'label,pcoord0[,pcoord1[,...]]' strings in ``tstates`` and/or read from ``tstate_file``.
+    Any of these may be None.'''
+
     westpa.rc.work_manager = work_manager = make_work_manager()
 
     system = westpa.rc.get_system_driver()
@@ -97,19 +114,19 @@ def entry_point():
         if work_manager.is_master:
             # Process target states
             target_states = []
-            if args.tstate_file:
-                target_states.extend(TargetState.states_from_file(args.tstate_file, system.pcoord_dtype))
-            if args.tstates:
-                tstates_strio = io.StringIO('\n'.join(args.tstates).replace(',', ' '))
+            if tstate_file:
+                target_states.extend(TargetState.states_from_file(tstate_file, system.pcoord_dtype))
+            if tstates:
+                tstates_strio = io.StringIO('\n'.join(tstates).replace(',', ' '))
                 target_states.extend(TargetState.states_from_file(tstates_strio, system.pcoord_dtype))
                 del tstates_strio
 
             # Process basis states
             basis_states = []
-            if args.bstate_file:
-                basis_states.extend(BasisState.states_from_file(args.bstate_file))
-            if args.bstates:
-                for bstate_str in args.bstates:
+            if bstate_file:
+                basis_states.extend(BasisState.states_from_file(bstate_file))
+            if bstates:
+                for bstate_str in bstates:
                     fields = bstate_str.split(',')
                     label = fields[0]
                     probability = float(fields[1])
@@ -132,9 +149,7 @@ def entry_point():
                     bstate.probability *= pscale
 
             # Prepare simulation
-            sim_manager.initialize_simulation(
-                basis_states, target_states, segs_per_state=args.segs_per_state, suppress_we=args.shotgun
-            )
+            sim_manager.initialize_simulation(basis_states, target_states, segs_per_state=segs_per_state, suppress_we=shotgun)
         else:
             work_manager.run()
 
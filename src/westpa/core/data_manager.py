@@ -58,6 +58,17 @@ log = logging.getLogger(__name__)
 
 file_format_version = 7
 
+# Check once whether this h5py exposes the scale/offset filter, rather than on every dataset creation
+try:
+    import h5py._hl.filters
+
+    h5py._hl.filters._COMP_FILTERS['scaleoffset']
+except (ImportError, KeyError, AttributeError):
+    # filter not available, or an unexpected version of h5py
+    scaleoffset_available = False
+else:
+    scaleoffset_available = True
+
 
 class flushing_lock:
     def __init__(self, lock, fileobj):
@@ -200,6 +211,11 @@ class WESTDataManager:
     default_we_h5file_driver = None
     default_flush_period = 60
 
+    # Raw data chunk cache size (bytes) and hash table slots for the main HDF5 file;
+    # None leaves the HDF5 defaults (1 MiB, 521 slots) in place
+    default_we_h5file_chunk_cache_size = None
+    default_we_h5file_chunk_cache_slots = None
+
     # Compress any auxiliary dataset whose total size (across all segments) is more than 1MB
     default_aux_compression_threshold = 1048576
 
@@ -209,6 +225,9 @@ class WESTDataManager:
     # Number of rows to retrieve during a table scan
     table_scan_chunksize = 1024
 
+    # Maximum number of auxiliary HDF5 files (``file`` dataset option) kept open at once
+    max_open_aux_files = 8
+
     def flushing_lock(self):
         return flushing_lock(self.lock, self.we_h5file)
 
@@ -234,6 +253,10 @@ class WESTDataManager:
             ['west', 'data', 'aux_compression_threshold'], self.default_aux_compression_threshold
         )
         self.flush_period = config.get(['west', 'data', 'flush_period'], self.default_flush_period)
+        self.we_h5file_chunk_cache_size = config.get(['west', 'data', 'chunk_cache_size'], self.default_we_h5file_chunk_cache_size)
+        self.we_h5file_chunk_cache_slots = config.get(
+            ['west', 'data', 'chunk_cache_slots'], self.default_we_h5file_chunk_cache_slots
+        )
 
         # Process dataset options
         dsopts_list = config.get(['west', 'data', 'datasets']) or []
@@ -255,6 +278,8 @@ class WESTDataManager:
         self.we_h5filename = self.default_we_h5filename
         self.we_h5file_driver = self.default_we_h5file_driver
         self.we_h5file_version = None
+        self.we_h5file_chunk_cache_size = self.default_we_h5file_chunk_cache_size
+        self.we_h5file_chunk_cache_slots = self.default_we_h5file_chunk_cache_slots
         self.h5_access_mode = 'r+'
         self.iter_prec = self.default_iter_prec
         self.aux_compression_threshold = self.default_aux_compression_threshold
@@ -267,6 +292,26 @@ class WESTDataManager:
 
         self._system = None
 
+        # The most recently written iteration summary row, as (n_iter, row); the simulation
+        # loop reads back rows it has just written, so these are served from memory while writing
+        self._last_iter_summary = None
+
+        # The current iteration number, as last read from or written to the HDF5 file; this is
+        # consulted many times per iteration but only changes through the setter below
+        self._current_iteration = None
+
+        # Whether the HDF5 file is open for writing. File state such as the current iteration is only
+        # cached while writing, since a file opened read-only may be updated by the process writing it
+        self._backing_writable = False
+
+        # Map of stored bin mapper hash to its index in /bin_topologies, built on first lookup
+        self._bin_mapper_indices = None
+
+        # Auxiliary HDF5 files named by the ``file`` dataset option, by filename, in order of last use.
+        # These are kept open between dataset creations so that each iteration does not reopen them;
+        # since the file name may contain the iteration number, only the most recently used few are kept open.
+        self._aux_files = {}
+
         self.dataset_options = {}
         self.process_config()
 
@@ -315,26 +360,47 @@ class WESTDataManager:
 
     @property
     def current_iteration(self):
+        if self._current_iteration is not None and self._backing_writable:
+            return self._current_iteration
+
         with self.lock:
             h5file_attrs = self.we_h5file['/'].attrs
             h5file_attr_keys = list(h5file_attrs.keys())
 
             if 'west_current_iteration' in h5file_attr_keys:
-                return int(self.we_h5file['/'].attrs['west_current_iteration'])
+                current_iteration = int(self.we_h5file['/'].attrs['west_current_iteration'])
             else:
-                return int(self.we_h5file['/'].attrs['wemd_current_iteration'])
+                current_iteration = int(self.we_h5file['/'].attrs['wemd_current_iteration'])
+            if self._backing_writable:
+                self._current_iteration = current_iteration
+            return current_iteration
 
     @current_iteration.setter
     def current_iteration(self, n_iter):
         with self.lock:
             self.we_h5file['/'].attrs['west_current_iteration'] = n_iter
+            self._current_iteration = int(n_iter)
+
+    def _we_h5file_kwargs(self):
+        '''Keyword arguments for opening the main HDF5 file. The chunk cache is a property of the file
+        handle, so it applies to every chunked dataset read or written through it, and changes only take
+        effect the next time the file is opened.'''
+        kwargs = {'driver': self.we_h5file_driver}
+        if self.we_h5file_chunk_cache_size is not None:
+            kwargs['rdcc_nbytes'] = int(self.we_h5file_chunk_cache_size)
+        if self.we_h5file_chunk_cache_slots is not None:
+            kwargs['rdcc_nslots'] = int(self.we_h5file_chunk_cache_slots)
+        return kwargs
 
     def open_backing(self, mode=None):
         '''Open the (already-created) HDF5 file named in self.west_h5filename.'''
         mode = mode or self.h5_access_mode
         if not self.we_h5file:
             log.debug('attempting to open {} with mode {}'.format(self.we_h5filename, mode))
-            self.we_h5file = h5io.WESTPAH5File(self.we_h5filename, mode, driver=self.we_h5file_driver)
+            self.we_h5file = h5io.WESTPAH5File(self.we_h5filename, mode, **self._we_h5file_kwargs())
+            self._backing_writable = mode != 'r'
+            self._current_iteration = None
+            self._bin_mapper_indices = None
 
             h5file_attrs = self.we_h5file['/'].attrs
             h5file_attr_keys = list(h5file_attrs.keys())
@@ -358,7 +424,11 @@ class WESTDataManager:
 
     def prepare_backing(self):  # istates):
         '''Create new HDF5 file'''
-        self.we_h5file = h5py.File(self.we_h5filename, 'w', driver=self.we_h5file_driver)
+        self.we_h5file = h5py.File(self.we_h5filename, 'w', **self._we_h5file_kwargs())
+        self._backing_writable = True
+        self._last_iter_summary = None
+        self._current_iteration = None
+        self._bin_mapper_indices = None
 
         with self.flushing_lock():
             self.we_h5file['/'].attrs['west_file_format_version'] = file_format_version
@@ -371,14 +441,46 @@ class WESTDataManager:
         if self.we_h5file is not None:
             with self.lock:
                 self.we_h5file.close()
+                self.close_aux_files()
             self.we_h5file = None
+        self._backing_writable = False
+        self._last_iter_summary = None
+        self._current_iteration = None
+        self._bin_mapper_indices = None
 
     def flush_backing(self):
         if self.we_h5file is not None:
             with self.lock:
                 self.we_h5file.flush()
+                self.flush_aux_files()
                 self.last_flush = time.time()
 
+    def get_aux_file(self, filename):
+        '''Return the open auxiliary HDF5 file ``filename``, opening it if necessary.'''
+        h5_auxfile = self._aux_files.pop(filename, None)
+        if not h5_auxfile:
+            # not yet opened, or closed behind our back
+            while len(self._aux_files) >= self.max_open_aux_files:
+                stale_auxfile = self._aux_files.pop(next(iter(self._aux_files)))
+                if stale_auxfile:
+                    stale_auxfile.close()
+            h5_auxfile = h5io.WESTPAH5File(filename, 'a')
+        self._aux_files[filename] = h5_auxfile
+        return h5_auxfile
+
+    def flush_aux_files(self):
+        '''Flush all auxiliary HDF5 files opened by get_aux_file().'''
+        for h5_auxfile in self._aux_files.values():
+            if h5_auxfile:
+                h5_auxfile.flush()
+
+    def close_aux_files(self):
+        '''Close all auxiliary HDF5 files opened by get_aux_file().'''
+        while self._aux_files:
+            _filename, h5_auxfile = self._aux_files.popitem()
+            if h5_auxfile:
+                h5_auxfile.close()
+
     def save_target_states(self, tstates, n_iter=None):
         '''Save the given target states in the HDF5 file; they will be used for the next iteration to
         be propagated.  A complete set is required, even if nominally appending to an existing set,
@@ -745,15 +847,10 @@ class WESTDataManager:
             # In fact, this appears to be an h5py best practice (collect as much in ram as possible and then dump)
             seg_index_table = seg_index_table_ds[...]
 
-            summary_row = np.zeros((1,), dtype=summary_table_dtype)
-            summary_row['n_particles'] = n_particles
-            summary_row['norm'] = np.add.reduce(list(map(attrgetter('weight'), segments)))
-            summary_table[n_iter - 1] = summary_row
-
             # pcoord is indexed as [particle, time, dimension]
             pcoord_opts = self.dataset_options.get('pcoord', {'name': 'pcoord', 'h5path': 'pcoord', 'compression': False})
             shape = (n_particles, pcoord_len, pcoord_ndim)
-            pcoord_ds = create_dataset_from_dsopts(iter_group, pcoord_opts, shape, pcoord_dtype)
+            pcoord_ds = create_dataset_from_dsopts(iter_group, pcoord_opts, shape, pcoord_dtype, get_aux_file=self.get_aux_file)
             pcoord = np.empty((n_particles, pcoord_len, pcoord_ndim), pcoord_dtype)
 
             total_parents = 0
@@ -765,11 +862,12 @@ class WESTDataManager:
                 # Parent must be set, though what it means depends on initpoint_type
                 assert segment.parent_id is not None
                 segment.seg_id = seg_id
-                seg_index_table[seg_id]['status'] = segment.status
-                seg_index_table[seg_id]['weight'] = segment.weight
-                seg_index_table[seg_id]['parent_id'] = segment.parent_id
-                seg_index_table[seg_id]['wtg_n_parents'] = len(segment.wtg_parent_ids)
-                seg_index_table[seg_id]['wtg_offset'] = total_parents
+                index_row = seg_index_table[seg_id]
+                index_row['status'] = segment.status
+                index_row['weight'] = segment.weight
+                index_row['parent_id'] = segment.parent_id
+                index_row['wtg_n_parents'] = len(segment.wtg_parent_ids)
+                index_row['wtg_offset'] = total_parents
                 total_parents += len(segment.wtg_parent_ids)
 
                 # Assign progress coordinate if any exists
@@ -785,6 +883,13 @@ class WESTDataManager:
                     else:
                         pcoord[seg_id, ...] = segment.pcoord
 
+            # The norm comes from the weights just gathered into the index, rather than another pass over segments
+            summary_row = np.zeros((1,), dtype=summary_table_dtype)
+            summary_row['n_particles'] = n_particles
+            summary_row['norm'] = seg_index_table['weight'].sum()
+            summary_table[n_iter - 1] = summary_row
+            self._last_iter_summary = (n_iter, summary_row[0].copy())
+
             if total_parents > 0:
                 wtgraph_ds = iter_group.create_dataset('wtgraph', (total_parents,), seg_id_dtype, compression='gzip', shuffle=True)
                 parents = np.empty((total_parents,), seg_id_dtype)
@@ -830,16 +935,22 @@ class WESTDataManager:
     def get_iter_summary(self, n_iter=None):
         n_iter = n_iter or self.current_iteration
         with self.lock:
+            last_summary = self._last_iter_summary
+            if last_summary is not None and last_summary[0] == n_iter and self._backing_writable:
+                # callers modify the returned row, so hand out a copy
+                return last_summary[1].copy()
             return self.we_h5file['summary'][n_iter - 1]
 
     def update_iter_summary(self, summary, n_iter=None):
         n_iter = n_iter or self.current_iteration
         with self.lock:
             self.we_h5file['summary'][n_iter - 1] = summary
+            self._last_iter_summary = (n_iter, np.array(summary, dtype=summary_table_dtype)[()])
 
     def del_iter_summary(self, min_iter):  # delete the iterations starting at min_iter
         with self.lock:
             self.we_h5file['summary'].resize((min_iter - 1,))
+            self._last_iter_summary = None
 
     def update_segments(self, n_iter, segments):
         '''Update segment information in the HDF5 file; all prior information for each
@@ -871,11 +982,12 @@ class WESTDataManager:
             pc_fsel = pc_dsid.get_space()
             si_fsel = si_dsid.get_space()
 
-            for iseg in range(n_segments):
-                seg_id = seg_ids[iseg]
-                op = h5s.SELECT_OR if iseg != 0 else h5s.SELECT_SET
-                si_fsel.select_hyperslab((seg_id,), (1,), op=op)
-                pc_fsel.select_hyperslab((seg_id, 0, 0), (1, pcoord_len, pcoord_ndim), op=op)
+            # select each run of consecutive segment IDs as one hyperslab, rather than one per segment,
+            # so that a full iteration's update is a single contiguous block in the file
+            for (irun, (first_seg_id, run_len)) in enumerate(contiguous_runs(seg_ids)):
+                op = h5s.SELECT_OR if irun != 0 else h5s.SELECT_SET
+                si_fsel.select_hyperslab((first_seg_id,), (run_len,), op=op)
+                pc_fsel.select_hyperslab((first_seg_id, 0, 0), (run_len, pcoord_len, pcoord_ndim), op=op)
 
             # read summary data so that we have valud parent and weight transfer information
             si_dsid.read(si_msel, si_fsel, seg_index_entries)
@@ -922,7 +1034,13 @@ class WESTDataManager:
 
                     shape = (n_total_segments,) + shape
                     dset = require_dataset_from_dsopts(
-                        iter_group, dsopts, shape, dtype, autocompress_threshold=self.aux_compression_threshold, n_iter=n_iter
+                        iter_group,
+                        dsopts,
+                        shape,
+                        dtype,
+                        autocompress_threshold=self.aux_compression_threshold,
+                        n_iter=n_iter,
+                        get_aux_file=self.get_aux_file,
                     )
                     if dset is None:
                         # storage is suppressed
@@ -960,9 +1078,9 @@ class WESTDataManager:
             seg_index_ds = iter_group['seg_index']
 
             if file_version < 5:
-                all_parent_ids = iter_group['parents'][...]
+                wtgraph_ds = iter_group['parents']
             else:
-                all_parent_ids = iter_group['wtgraph'][...]
+                wtgraph_ds = iter_group['wtgraph']
 
             if seg_ids is not None:
                 seg_ids = list(sorted(seg_ids))
@@ -975,33 +1093,58 @@ class WESTDataManager:
                 if load_pcoords:
                     pcoord_entries = iter_group['pcoord'][...]
 
+            # Pull each index field out as a column of Python scalars once, rather than
+            # indexing (and converting) fields row by row
+            statuses = seg_index_entries['status'].tolist()
+            endpoint_types = seg_index_entries['endpoint_type'].tolist()
+            walltimes = seg_index_entries['walltime'].tolist()
+            cputimes = seg_index_entries['cputime'].tolist()
+            weights = seg_index_entries['weight'].tolist()
+            if file_version < 5:
+                all_wtg_n_parents = seg_index_entries['n_parents']
+                wtg_offsets = seg_index_entries['parents_offset']
+                parent_ids = None
+            else:
+                all_wtg_n_parents = seg_index_entries['wtg_n_parents']
+                wtg_offsets = seg_index_entries['wtg_offset']
+                parent_ids = seg_index_entries['parent_id'].tolist()
+
+            # When only some segments are requested, read just the span of the weight transfer
+            # graph that they refer to, and make their offsets relative to it
+            if seg_ids and len(seg_ids) < len(seg_index_ds):
+                wtg_start = int(wtg_offsets.min())
+                wtg_stop = int((wtg_offsets + all_wtg_n_parents).max())
+                all_parent_ids = wtgraph_ds[wtg_start:wtg_stop].tolist()
+                wtg_offsets = wtg_offsets - wtg_start
+            else:
+                all_parent_ids = wtgraph_ds[...].tolist()
+            all_wtg_n_parents = all_wtg_n_parents.tolist()
+            wtg_offsets = wtg_offsets.tolist()
+
             segments = []
 
-            for iseg, (seg_id, row) in enumerate(zip(seg_ids, seg_index_entries)):
+            for iseg, seg_id in enumerate(seg_ids):
                 segment = Segment(
                     seg_id=seg_id,
                     n_iter=n_iter,
-                    status=int(row['status']),
-                    endpoint_type=int(row['endpoint_type']),
-                    walltime=float(row['walltime']),
-                    cputime=float(row['cputime']),
-                    weight=float(row['weight']),
+                    status=statuses[iseg],
+                    endpoint_type=endpoint_types[iseg],
+                    walltime=walltimes[iseg],
+                    cputime=cputimes[iseg],
+                    weight=weights[iseg],
                 )
 
                 if load_pcoords:
                     segment.pcoord = pcoord_entries[iseg]
 
-                if file_version < 5:
-                    wtg_n_parents = row['n_parents']
-                    wtg_offset = row['parents_offset']
-                    wtg_parent_ids = all_parent_ids[wtg_offset : wtg_offset + wtg_n_parents]
-                    segment.parent_id = int(wtg_parent_ids[0])
+                wtg_n_parents = all_wtg_n_parents[iseg]
+                wtg_offset = wtg_offsets[iseg]
+                wtg_parent_ids = all_parent_ids[wtg_offset : wtg_offset + wtg_n_parents]
+                if parent_ids is None:
+                    segment.parent_id = wtg_parent_ids[0]
                 else:
-                    wtg_n_parents = row['wtg_n_parents']
-                    wtg_offset = row['wtg_offset']
-                    wtg_parent_ids = all_parent_ids[wtg_offset : wtg_offset + wtg_n_parents]
-                    segment.parent_id = int(row['parent_id'])
-                segment.wtg_parent_ids = set(map(int, wtg_parent_ids))
+                    segment.parent_id = parent_ids[iseg]
+                segment.wtg_parent_ids = set(wtg_parent_ids)
                 assert len(segment.wtg_parent_ids) == wtg_n_parents
                 segments.append(segment)
             del all_parent_ids
@@ -1040,16 +1183,18 @@ class WESTDataManager:
             iter_group = self.get_iter_group(n_iter)
             seg_index = iter_group['seg_index']
 
-            if seg_ids is None:
-                seg_ids = range(len(seg_index))
-
             if file_version < 5:
                 offsets = seg_index['parents_offset']
                 all_parents = iter_group['parents'][...]
-                return [all_parents[offsets[seg_id]] for seg_id in seg_ids]
+                parent_ids = all_parents.take(offsets)
+            else:
+                parent_ids = seg_index['parent_id']
+
+            # Look up all requested parents at once, rather than one index at a time
+            if seg_ids is None:
+                return list(parent_ids)
             else:
-                all_parents = seg_index['parent_id']
-                return [all_parents[seg_id] for seg_id in seg_ids]
+                return list(parent_ids.take(np.asarray(list(seg_ids), dtype=np.intp)))
 
     def get_weights(self, n_iter, seg_ids):
         '''Return the weights associated with the given seg_ids'''
@@ -1231,27 +1376,31 @@ class WESTDataManager:
         except AttributeError:
             pass
 
+        # hashes are stored as fixed-length byte strings
+        hashkey = hashval.encode('ascii') if isinstance(hashval, str) else bytes(hashval)
+
         with self.lock:
-            # these will raise KeyError if the group doesn't exist, which also means
-            # that bin data is not available, so no special treatment here
-            try:
-                binning_group = self.we_h5file['/bin_topologies']
-                index = binning_group['index']
-            except KeyError:
-                raise KeyError('hash {} not found'.format(hashval))
+            # The index is append-only, so it is scanned into a hash -> index map; on a miss the map is
+            # rebuilt, in case the mapper was stored since the last scan (for instance, by another writer)
+            if self._bin_mapper_indices is None or hashkey not in self._bin_mapper_indices:
+                # these will raise KeyError if the group doesn't exist, which also means
+                # that bin data is not available, so no special treatment here
+                try:
+                    binning_group = self.we_h5file['/bin_topologies']
+                    index = binning_group['index']
+                except KeyError:
+                    raise KeyError('hash {} not found'.format(hashval))
 
-            n_entries = len(index)
-            if n_entries == 0:
-                raise KeyError('hash {} not found'.format(hashval))
+                # the first occurrence of a hash wins, as in a linear scan
+                bin_mapper_indices = {}
+                for (i, stored_hash) in enumerate(index['hash'].tolist() if len(index) else []):
+                    bin_mapper_indices.setdefault(stored_hash, i)
+                self._bin_mapper_indices = bin_mapper_indices
 
-            chunksize = self.table_scan_chunksize
-            for istart in range(0, n_entries, chunksize):
-                chunk = index[istart : min(istart + chunksize, n_entries)]
-                for i in range(len(chunk)):
-                    if chunk[i]['hash'] == hashval:
-                        return istart + i
-
-            raise KeyError('hash {} not found'.format(hashval))
+            try:
+                return self._bin_mapper_indices[hashkey]
+            except KeyError:
+                raise KeyError('hash {} not found'.format(hashval)) from None
 
     def get_bin_mapper(self, hashval):
         '''Look up the given hash value in the binning table, unpickling and returning the corresponding
@@ -1264,32 +1413,16 @@ class WESTDataManager:
             pass
 
         with self.lock:
-            # these will raise KeyError if the group doesn't exist, which also means
-            # that bin data is not available, so no special treatment here
-            try:
-                binning_group = self.we_h5file['/bin_topologies']
-                index = binning_group['index']
-                pkl = binning_group['pickles']
-            except KeyError:
-                raise KeyError('hash {} not found. Could not retrieve binning group'.format(hashval))
-
-            n_entries = len(index)
-            if n_entries == 0:
-                raise KeyError('hash {} not found. No entries in index'.format(hashval))
+            i = self.find_bin_mapper(hashval)
 
-            chunksize = self.table_scan_chunksize
-
-            for istart in range(0, n_entries, chunksize):
-                chunk = index[istart : min(istart + chunksize, n_entries)]
-                for i in range(len(chunk)):
-                    if chunk[i]['hash'] == hashval:
-                        pkldat = bytes(pkl[istart + i, 0 : chunk[i]['pickle_len']].data)
-                        mapper = pickle.loads(pkldat)
-                        log.debug('loaded {!r} from {!r}'.format(mapper, binning_group))
-                        log.debug('hash value {!r}'.format(hashval))
-                        return mapper
-
-            raise KeyError('hash {} not found'.format(hashval))
+            binning_group = self.we_h5file['/bin_topologies']
+            pickle_len = binning_group['index'][i]['pickle_len']
+            pkldat = bytes(binning_group['pickles'][i, 0:pickle_len].data)
+            # latin1 lets mappers pickled under Python 2 (including their numpy arrays) load as well
+            mapper = pickle.loads(pkldat, encoding='latin1')
+            log.debug('loaded {!r} from {!r}'.format(mapper, binning_group))
+            log.debug('hash value {!r}'.format(hashval))
+            return mapper
 
     def save_bin_mapper(self, hashval, pickle_data):
         '''Store the given mapper in the table of saved mappers. If the mapper cannot be stored,
@@ -1337,6 +1470,8 @@ class WESTDataManager:
             index_row['pickle_len'] = len(pickle_data)
             index[n_entries - 1] = index_row
             pickle_ds[n_entries - 1, : len(pickle_data)] = memoryview(pickle_data)
+            if self._bin_mapper_indices is not None:
+                self._bin_mapper_indices[index_row['hash']] = n_entries - 1
             return n_entries - 1
 
     def save_iter_binning(self, n_iter, hashval, pickled_mapper, target_counts):
@@ -1382,17 +1517,19 @@ def normalize_dataset_options(dsopts, path_prefix='', n_iter=0):
     return dsopts
 
 
-def create_dataset_from_dsopts(group, dsopts, shape=None, dtype=None, data=None, autocompress_threshold=None, n_iter=None):
+def create_dataset_from_dsopts(
+    group, dsopts, shape=None, dtype=None, data=None, autocompress_threshold=None, n_iter=None, get_aux_file=None
+):
     # log.debug('create_dataset_from_dsopts(group={!r}, dsopts={!r}, shape={!r}, dtype={!r}, data={!r}, autocompress_threshold={!r})'
     #          .format(group,dsopts,shape,dtype,data,autocompress_threshold))
     if not dsopts.get('store', True):
         return None
 
     if 'file' in list(dsopts.keys()):
-        import h5py
-
         #        dsopts['file'] = str(dsopts['file']).format(n_iter=n_iter)
-        h5_auxfile = h5io.WESTPAH5File(dsopts['file'].format(n_iter=n_iter))
+        aux_filename = dsopts['file'].format(n_iter=n_iter)
+        # get_aux_file, if given, supplies already-open files (see WESTDataManager.get_aux_file)
+        h5_auxfile = get_aux_file(aux_filename) if get_aux_file else h5io.WESTPAH5File(aux_filename, 'a')
         h5group = group
         if not ("iter_" + str(n_iter).zfill(8)) in h5_auxfile:
             h5_auxfile.create_group("iter_" + str(n_iter).zfill(8))
@@ -1475,16 +1612,11 @@ def create_dataset_from_dsopts(group, dsopts, shape=None, dtype=None, data=None,
 
     opts = {'shape': shape, 'dtype': h5_dtype, 'compression': compression, 'shuffle': shuffle, 'chunks': chunks}
 
-    try:
-        import h5py._hl.filters
-
-        h5py._hl.filters._COMP_FILTERS['scaleoffset']
-    except (ImportError, KeyError, AttributeError):
-        # filter not available, or an unexpected version of h5py
+    if scaleoffset_available:
+        opts['scaleoffset'] = scaleoffset
+    else:
         # use lossless compression instead
         opts['compression'] = True
-    else:
-        opts['scaleoffset'] = scaleoffset
 
     if log.isEnabledFor(logging.DEBUG):
         log.debug('requiring aux dataset {!r}, shape={!r}, opts={!r}'.format(h5_dsname, shape, opts))
@@ -1495,8 +1627,6 @@ def create_dataset_from_dsopts(group, dsopts, shape=None, dtype=None, data=None,
         dset[...] = data
 
     if 'file' in list(dsopts.keys()):
-        import h5py
-
         if not dsopts['h5path'] in h5group:
             h5group[dsopts['h5path']] = h5py.ExternalLink(
                 dsopts['file'].format(n_iter=n_iter), ("/" + "iter_" + str(n_iter).zfill(8) + "/" + dsopts['h5path'])
@@ -1505,14 +1635,23 @@ def create_dataset_from_dsopts(group, dsopts, shape=None, dtype=None, data=None,
     return dset
 
 
-def require_dataset_from_dsopts(group, dsopts, shape=None, dtype=None, data=None, autocompress_threshold=None, n_iter=None):
+def require_dataset_from_dsopts(
+    group, dsopts, shape=None, dtype=None, data=None, autocompress_threshold=None, n_iter=None, get_aux_file=None
+):
     if not dsopts.get('store', True):
         return None
     try:
         return group[dsopts['h5path']]
     except KeyError:
         return create_dataset_from_dsopts(
-            group, dsopts, shape=shape, dtype=dtype, data=data, autocompress_threshold=autocompress_threshold, n_iter=n_iter
+            group,
+            dsopts,
+            shape=shape,
+            dtype=dtype,
+            data=data,
+            autocompress_threshold=autocompress_threshold,
+            n_iter=n_iter,
+            get_aux_file=get_aux_file,
         )
 
 
@@ -1537,3 +1676,17 @@ def calc_chunksize(shape, dtype, max_chunksize=262144):
         )
     )
     return chunk_shape
+
+
+def contiguous_runs(indices):
+    '''Split a sequence of integer indices into runs of consecutive increasing values, returned
+    as a list of ``(first_index, run_length)`` tuples. Runs follow the order of ``indices``;
+    unsorted or repeated indices start new runs, so the runs always cover ``indices`` exactly.'''
+
+    indices = np.asarray(indices, dtype=np.int64)
+    if not len(indices):
+        return []
+
+    run_starts = np.concatenate(([0], np.flatnonzero(np.diff(indices) != 1) + 1))
+    run_lengths = np.diff(np.concatenate((run_starts, [len(indices)])))
+    return list(zip(indices[run_starts].tolist(), run_lengths.tolist()))
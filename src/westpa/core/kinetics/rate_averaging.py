@@ -42,34 +42,26 @@ def tuple2stats(stat_tuple):
     return stats
 
 
-def process_iter_chunk(bin_mapper, iter_indices, iter_data=None):
-    '''Calculate the flux matrices and populations of a set of iterations specified
-    by iter_indices. Optionally provide the necessary arrays to perform the calculation
-    in iter_data. Otherwise get data from the data_manager directly.
+def iter_fluxes_populations(bin_mapper, iter_indices, iter_data=None):
+    '''Calculate the flux matrix and population vector of each of the iterations specified by
+    iter_indices, yielding ``(n_iter, flux_matrix, population_vector)`` for each. Optionally
+    provide the necessary arrays to perform the calculation in iter_data. Otherwise get data
+    from the data_manager directly. The yielded arrays are reused from one iteration to the
+    next, and must be copied if they are to be kept.
     '''
 
     data_manager = westpa.rc.get_data_manager()
     system = westpa.rc.get_system_driver()
 
-    # itercount = len(iter_indices)
     nbins = bin_mapper.nbins
 
-    flux_stats = StreamingStats2D((nbins, nbins))
-    rate_stats = StreamingStats2D((nbins, nbins))
-    pop_stats = StreamingStats1D(nbins)
-
-    nomask1d = np.zeros((nbins,), np.uint8)
-    nomask2d = np.zeros((nbins, nbins), np.uint8)
-    rate_mask = np.zeros((nbins, nbins), np.uint8)
-
     flux_matrix = np.zeros((nbins, nbins), np.float64)
-    rate_matrix = np.zeros((nbins, nbins), np.float64)
     population_vector = np.zeros((nbins,), np.float64)
 
     pcoord_len = system.pcoord_len
     assign = bin_mapper.assign
 
-    for iiter, n_iter in enumerate(iter_indices):
+    for n_iter in iter_indices:
         flux_matrix.fill(0.0)
         population_vector.fill(0.0)
 
@@ -114,9 +106,12 @@ def process_iter_chunk(bin_mapper, iter_indices, iter_data=None):
             initial_pcoords = iter_group['initial_pcoords']
             final_pcoords = iter_group['final_pcoords']
         else:
+            # resolve the pcoord dataset once for both the initial and final point reads
+            pcoord_ds = iter_group['pcoord']
             weights = iter_group['seg_index']['weight']
-            initial_pcoords = iter_group['pcoord'][:, 0]
-            final_pcoords = iter_group['pcoord'][:, pcoord_len - 1]
+            initial_pcoords = pcoord_ds[:, 0]
+            final_pcoords = pcoord_ds[:, pcoord_len - 1]
+            del pcoord_ds
 
         initial_assignments = assign(initial_pcoords)
         final_assignments = assign(final_pcoords)
@@ -124,17 +119,39 @@ def process_iter_chunk(bin_mapper, iter_indices, iter_data=None):
         flux_assign(weights, initial_assignments, final_assignments, flux_matrix)
         pop_assign(weights, initial_assignments, population_vector)
 
+        del weights
+        del initial_assignments, final_assignments
+        del initial_pcoords, final_pcoords
+        del iter_group
+
+        yield n_iter, flux_matrix, population_vector
+
+
+def process_iter_chunk(bin_mapper, iter_indices, iter_data=None):
+    '''Calculate the flux matrices and populations of a set of iterations specified
+    by iter_indices. Optionally provide the necessary arrays to perform the calculation
+    in iter_data. Otherwise get data from the data_manager directly.
+    '''
+
+    nbins = bin_mapper.nbins
+
+    flux_stats = StreamingStats2D((nbins, nbins))
+    rate_stats = StreamingStats2D((nbins, nbins))
+    pop_stats = StreamingStats1D(nbins)
+
+    nomask1d = np.zeros((nbins,), np.uint8)
+    nomask2d = np.zeros((nbins, nbins), np.uint8)
+    rate_mask = np.zeros((nbins, nbins), np.uint8)
+
+    rate_matrix = np.zeros((nbins, nbins), np.float64)
+
+    for _n_iter, flux_matrix, population_vector in iter_fluxes_populations(bin_mapper, iter_indices, iter_data):
         flux_stats.update(flux_matrix, nomask2d)
         pop_stats.update(population_vector, nomask1d)
 
         calc_rates(flux_matrix, population_vector, rate_matrix, rate_mask)
         rate_stats.update(rate_matrix, rate_mask)
 
-        del weights
-        del initial_assignments, final_assignments
-        del initial_pcoords, final_pcoords
-        del iter_group
-
     # Create namedtuple proxies for the cython StreamingStats objects
     # since the typed memoryviews class variables do not seem to return
     # cleanly from the zmq workers
@@ -155,6 +172,9 @@ class RateAverager:
         self.system = system or westpa.rc.get_system_driver()
         self.work_manager = work_manager or westpa.rc.get_work_manager()
 
+        # Per-iteration (flux_matrix, population_vector) pairs kept by calculate_windowed()
+        self.iter_cache = {}
+
     def extract_data(self, iter_indices):
         '''Extract data from the data_manger and place in dict mirroring the same
         underlying layout.'''
@@ -230,6 +250,48 @@ class RateAverager:
                 rate_stats += chunk_rate_stats
                 population_stats += chunk_pop_stats
 
+        self._store_results(flux_stats, rate_stats, population_stats)
+
+    def calculate_windowed(self, iter_start, iter_stop):
+        '''Calculate the same quantities as calculate(), for the iterations in the range
+        [iter_start, iter_stop), but keep each iteration's flux matrix and population vector
+        in memory. Repeated calls over a sliding window of iterations then only read
+        iterations not seen before from the HDF5 file. Cached iterations before iter_start
+        are discarded, so the cache holds the current window, about 8*nbins**2 bytes per
+        iteration; a window that grows with the simulation grows the cache with it.
+        The calculation is not distributed over the work manager.'''
+
+        nbins = self.bin_mapper.nbins
+        iter_cache = self.iter_cache
+
+        for n_iter in [n_iter for n_iter in iter_cache if n_iter < iter_start]:
+            del iter_cache[n_iter]
+
+        missing_iters = [n_iter for n_iter in range(iter_start, iter_stop) if n_iter not in iter_cache]
+        for n_iter, flux_matrix, population_vector in iter_fluxes_populations(self.bin_mapper, missing_iters):
+            iter_cache[n_iter] = (flux_matrix.copy(), population_vector.copy())
+
+        flux_stats = StreamingStats2D((nbins, nbins))
+        rate_stats = StreamingStats2D((nbins, nbins))
+        population_stats = StreamingStats1D(nbins)
+
+        nomask1d = np.zeros((nbins,), np.uint8)
+        nomask2d = np.zeros((nbins, nbins), np.uint8)
+        rate_mask = np.zeros((nbins, nbins), np.uint8)
+        rate_matrix = np.zeros((nbins, nbins), np.float64)
+
+        # Accumulate in iteration order, exactly as process_iter_chunk() would
+        for n_iter in range(iter_start, iter_stop):
+            flux_matrix, population_vector = iter_cache[n_iter]
+            flux_stats.update(flux_matrix, nomask2d)
+            population_stats.update(population_vector, nomask1d)
+
+            calc_rates(flux_matrix, population_vector, rate_matrix, rate_mask)
+            rate_stats.update(rate_matrix, rate_mask)
+
+        self._store_results(flux_stats, rate_stats, population_stats)
+
+    def _store_results(self, flux_stats, rate_stats, population_stats):
         self.average_flux = flux_stats.mean
         self.stderr_flux = np.nan_to_num(np.sqrt(flux_stats.var) / flux_stats.n)
 
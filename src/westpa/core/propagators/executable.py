@@ -453,13 +453,19 @@ class ExecutablePropagator(WESTPropagator):
             return_files = {}
             del_return_files = {}
 
+            # Template arguments are the same for every return file of this segment, so build them
+            # at most once rather than once per dataset
+            segment_template_args = None
+
             for dataset in self.data_info:
                 if not self.data_info[dataset].get('enabled', False):
                     continue
 
                 return_template = self.data_info[dataset].get('filename')
                 if return_template:
-                    return_files[dataset] = self.makepath(return_template, self.template_args_for_segment(segment))
+                    if segment_template_args is None:
+                        segment_template_args = self.template_args_for_segment(segment)
+                    return_files[dataset] = self.makepath(return_template, segment_template_args)
                     del_return_files[dataset] = False
                 else:
                     (fd, rfname) = tempfile.mkstemp()
@@ -13,7 +13,7 @@ import numpy as np
 import westpa
 from .data_manager import weight_dtype
 from .segment import Segment
-from .states import InitialState
+from .states import InitialState, pare_basis_initial_states
 from . import extloader
 from . import wm_ops
 
@@ -146,7 +146,7 @@ class WESimManager:
         target_counts = self.we_driver.bin_target_counts
 
         # Do not include bins with target count zero (e.g. sinks, never-filled bins) in the (non)empty bins statistics
-        n_active_bins = len(target_counts[target_counts != 0])
+        n_active_bins = np.count_nonzero(target_counts)
         seg_probs = np.fromiter(map(operator.attrgetter('weight'), segments), dtype=weight_dtype, count=len(segments))
         bin_probs = np.fromiter(map(operator.attrgetter('weight'), bins), dtype=weight_dtype, count=len(bins))
         norm = seg_probs.sum()
@@ -159,7 +159,7 @@ class WESimManager:
         min_bin_prob = bin_probs[bin_probs != 0].min()
         max_bin_prob = bin_probs.max()
         bin_drange = math.log(max_bin_prob / min_bin_prob)
-        n_pop = len(bin_counts[bin_counts != 0])
+        n_pop = np.count_nonzero(bin_counts)
 
         self.rc.pstatus('{:d} of {:d} ({:%}) active bins are populated'.format(n_pop, n_active_bins, n_pop / n_active_bins))
         self.rc.pstatus('per-bin minimum non-zero probability:       {:g}'.format(min_bin_prob))
@@ -264,9 +264,11 @@ class WESimManager:
         else:
             istate_type = InitialState.ISTATE_TYPE_BASIS
 
+        # Allocate storage for all initial states at once, rather than growing the index one state at a time
+        new_istates = iter(data_manager.create_initial_states(len(basis_states) * segs_per_state, 1))
         for basis_state in basis_states:
             for _iseg in range(segs_per_state):
-                initial_state = data_manager.create_initial_states(1, 1)[0]
+                initial_state = next(new_istates)
                 initial_state.basis_state_id = basis_state.state_id
                 initial_state.basis_state = basis_state
                 initial_state.istate_type = istate_type
@@ -287,8 +289,9 @@ class WESimManager:
                 initial_state.pcoord = basis_state.pcoord
                 initial_state.istate_status = InitialState.ISTATE_STATUS_PREPARED
 
-        for initial_state in initial_states:
-            log.debug('initial state created: {!r}'.format(initial_state))
+        if log.isEnabledFor(logging.DEBUG):
+            for initial_state in initial_states:
+                log.debug('initial state created: {!r}'.format(initial_state))
 
         # save list of initial states just generated
         # some of these may not be used, depending on how WE shakes out
@@ -327,10 +330,10 @@ class WESimManager:
         Total target replicas: {total_replicas:d}
         '''.format(
                 total_bins=len(bin_occupancies),
-                init_replicas=int(sum(bin_occupancies)),
-                occ_bins=len(bin_occupancies[bin_occupancies > 0]),
-                weight=float(sum(segment.weight for segment in segments)),
-                total_replicas=int(sum(target_occupancies)),
+                init_replicas=int(bin_occupancies.sum()),
+                occ_bins=np.count_nonzero(bin_occupancies),
+                weight=math.fsum(segment.weight for segment in segments),
+                total_replicas=int(target_occupancies.sum()),
             )
         )
 
@@ -364,9 +367,12 @@ class WESimManager:
             segments = self.segments
             log.debug('using {:d} pre-existing segments'.format(len(segments)))
 
+        # Partition segments and collect their initial points for binning in a single pass
         completed_segments = self.completed_segments = {}
         incomplete_segments = self.incomplete_segments = {}
-        for segment in segments.values():
+        initial_pcoords = self.system.new_pcoord_array(len(segments))
+        for iseg, segment in enumerate(segments.values()):
+            initial_pcoords[iseg] = segment.pcoord[0]
             if segment.status == Segment.SEG_STATUS_COMPLETE:
                 completed_segments[segment.seg_id] = segment
             else:
@@ -389,10 +395,7 @@ class WESimManager:
         log.debug('This iteration uses {:d} initial states'.format(len(self.current_iter_istates)))
 
         # Assign this iteration's segments' initial points to bins and report on bin population
-        initial_pcoords = self.system.new_pcoord_array(len(segments))
         initial_binning = self.system.bin_mapper.construct_bins()
-        for iseg, segment in enumerate(segments.values()):
-            initial_pcoords[iseg] = segment.pcoord[0]
         initial_assignments = self.system.bin_mapper.assign(initial_pcoords)
         for (segment, assignment) in zip(iter(segments.values()), initial_assignments):
             initial_binning[assignment].add(segment)
@@ -425,7 +428,9 @@ class WESimManager:
 
         self.invoke_callbacks(self.finalize_iteration)
 
-        # dispatch and immediately wait on result for post_iter
+        # dispatch and immediately wait on result for post_iter; an error in post_iter must be
+        # raised before this iteration's summary is written and the iteration counter advanced,
+        # and nothing else left in this iteration could overlap with it
         log.debug('dispatching propagator post_iter to work manager')
         self.work_manager.submit(wm_ops.post_iter, args=(self.n_iter, list(self.segments.values()))).get_result()
 
@@ -447,11 +452,15 @@ class WESimManager:
 
         futures = set()
         updated_states = []
-        for _i in range(n_istates_needed):
-            # Select a basis state according to its weight
-            ibstate = np.digitize([random.random()], self.next_iter_bstate_cprobs)
-            basis_state = self.next_iter_bstates[ibstate[0]]
-            initial_state = self.data_manager.create_initial_states(1, n_iter=self.n_iter + 1)[0]
+        if not n_istates_needed:
+            return futures
+
+        # Select basis states according to their weights, and allocate storage for all the new
+        # initial states at once
+        ibstates = np.digitize([random.random() for _i in range(n_istates_needed)], self.next_iter_bstate_cprobs)
+        new_istates = self.data_manager.create_initial_states(n_istates_needed, n_iter=self.n_iter + 1)
+        for ibstate, initial_state in zip(ibstates, new_istates):
+            basis_state = self.next_iter_bstates[ibstate]
             initial_state.iter_created = self.n_iter
             initial_state.basis_state_id = basis_state.state_id
             initial_state.istate_status = InitialState.ISTATE_STATUS_PENDING
@@ -485,7 +494,7 @@ class WESimManager:
         # Dispatch propagation tasks using work manager
         for segment_block in grouper(self.propagator_block_size, segments):
             segment_block = [_f for _f in segment_block if _f]
-            pbstates, pistates = westpa.core.states.pare_basis_initial_states(
+            pbstates, pistates = pare_basis_initial_states(
                 self.current_iter_bstates, list(self.current_iter_istates.values()), segment_block
             )
             future = self.work_manager.submit(wm_ops.propagate, args=(pbstates, pistates, segment_block))
@@ -593,7 +602,8 @@ class WESimManager:
                 initial_state.iter_used = self.n_iter + 1
             self.data_manager.update_initial_states(list(self.we_driver.used_initial_states.values()))
 
-        self.data_manager.update_segments(self.n_iter, list(self.segments.values()))
+        # update_segments sorts its input, so there is no need to copy the segments into a list first
+        self.data_manager.update_segments(self.n_iter, self.segments.values())
 
         self.data_manager.require_iter_group(self.n_iter + 1)
         self.data_manager.save_iter_binning(self.n_iter + 1, hashed, pickled, self.we_driver.bin_target_counts)
@@ -610,7 +620,9 @@ class WESimManager:
         for tstate_id, weights in recycling_events.items():
             tstate = tstates_by_id[tstate_id]
             self.rc.pstatus(
-                'Recycled {:g} probability ({:d} walkers) from target state {!r}'.format(sum(weights), len(weights), tstate.label)
+                'Recycled {:g} probability ({:d} walkers) from target state {!r}'.format(
+                    math.fsum(weights), len(weights), tstate.label
+                )
             )
 
     def prepare_new_iteration(self):
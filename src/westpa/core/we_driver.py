@@ -1,3 +1,4 @@
+import itertools
 import logging
 import math
 import operator
@@ -170,10 +171,8 @@ class WEDriver:
     @property
     def n_recycled_segs(self):
         '''Number of segments recycled this iteration'''
-        count = 0
-        for _segment in self.recycling_segments:
-            count += 1
-        return count
+        # count from the sizes of the target bins, rather than by walking every recycled segment
+        return sum(len(self.final_binning[ibin]) for ibin in self.target_states)
 
     @property
     def n_istates_needed(self):
@@ -226,7 +225,8 @@ class WEDriver:
         if bin_target_counts is not None:
             self.bin_target_counts = bin_target_counts
         else:
-            self.bin_target_counts = np.array(self.system.bin_target_counts).copy()
+            # np.array() already copies, so the system's target counts are never modified here
+            self.bin_target_counts = np.array(self.system.bin_target_counts)
         nbins = self.bin_mapper.nbins
         log.debug('mapper is {!r}, handling {:d} bins'.format(self.bin_mapper, nbins))
 
@@ -240,8 +240,14 @@ class WEDriver:
         # map target state specifications to bins
         target_states = target_states or []
         self.target_states = {}
-        for tstate in target_states:
-            tstate_assignment = self.bin_mapper.assign([tstate.pcoord])[0]
+        if target_states:
+            tstate_pcoords = np.empty((len(target_states), self.system.pcoord_ndim), dtype=self.system.pcoord_dtype)
+            for (itstate, tstate) in enumerate(target_states):
+                tstate_pcoords[itstate] = tstate.pcoord
+            tstate_assignments = self.bin_mapper.assign(tstate_pcoords)
+        else:
+            tstate_assignments = []
+        for (tstate, tstate_assignment) in zip(target_states, tstate_assignments):
             self.target_states[tstate_assignment] = tstate
             log.debug('target state {!r} mapped to bin {}'.format(tstate, tstate_assignment))
             self.bin_target_counts[tstate_assignment] = 0
@@ -332,7 +338,7 @@ class WEDriver:
 
         self.new_weights = []
 
-        n_recycled_walkers = len(list(self.recycling_segments))
+        n_recycled_walkers = self.n_recycled_segs
         if not n_recycled_walkers:
             return
         elif n_recycled_walkers > len(self.avail_initial_states):
@@ -342,13 +348,20 @@ class WEDriver:
                 )
             )
 
+        # Initial states are consumed in order, so the ones needed can be assigned to bins all at once
+        recycling_istates = list(itertools.islice(self.avail_initial_states.values(), n_recycled_walkers))
+        istate_pcoords = np.empty((n_recycled_walkers, self.system.pcoord_ndim), dtype=self.system.pcoord_dtype)
+        for (iistate, initial_state) in enumerate(recycling_istates):
+            istate_pcoords[iistate] = initial_state.pcoord
+        istate_assignments = self.bin_mapper.assign(istate_pcoords)
+        del istate_pcoords
+
         used_istate_ids = set()
-        istateiter = iter(self.avail_initial_states.values())
+        istateiter = iter(zip(recycling_istates, istate_assignments))
         for (ibin, target_state) in self.target_states.items():
             target_bin = self.next_iter_binning[ibin]
             for segment in set(target_bin):
-                initial_state = next(istateiter)
-                istate_assignment = self.bin_mapper.assign([initial_state.pcoord])[0]
+                initial_state, istate_assignment = next(istateiter)
                 parent = self._parent_map[segment.parent_id]
                 parent.endpoint_type = Segment.SEG_ENDPOINT_RECYCLED
 
@@ -407,7 +420,6 @@ class WEDriver:
                 pcoord=segment.pcoord.copy(),
                 status=Segment.SEG_STATUS_PREPARED,
             )
-            new_segment.pcoord[0, :] = segment.pcoord[0, :]
             new_segments.append(new_segment)
 
         bin.update(new_segments)
@@ -614,7 +626,7 @@ class WEDriver:
             segments.append(dummy_segment)
 
         # Adjust weights, if necessary
-        tprob = sum(weights)
+        tprob = math.fsum(weights)
         if abs(1.0 - tprob) > len(weights) * EPS:
             pscale = 1.0 / tprob
             log.warning('Weights of initial segments do not sum to unity; scaling by {:g}'.format(pscale))
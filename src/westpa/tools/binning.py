@@ -73,14 +73,17 @@ def mapper_from_hdf5(topol_group, hashval):
     if n_entries == 0:
         raise KeyError('hash {} not found'.format(hashval))
 
+    # hashes are stored as fixed-length byte strings
+    hashkey = hashval.encode('ascii') if isinstance(hashval, str) else bytes(hashval)
+
     chunksize = 256
     for istart in range(0, n_entries, chunksize):
         chunk = index_ds[istart : min(istart + chunksize, n_entries)]
         for i in range(len(chunk)):
-            if chunk[i]['hash'] == hashval:
+            if chunk[i]['hash'] == hashkey:
                 pkldat = bytes(pickle_ds[istart + i, 0 : chunk[i]['pickle_len']].data)
-                # mapper = pickle.loads(pkldat, encoding='latin1')
-                mapper = pickle.loads(pkldat)
+                # latin1 lets mappers pickled under Python 2 (including their numpy arrays) load as well
+                mapper = pickle.loads(pkldat, encoding='latin1')
                 log.debug('loaded {!r} from {!r}'.format(mapper, topol_group))
                 log.debug('hash value {!r}'.format(hashval))
                 return mapper, pkldat, hashval
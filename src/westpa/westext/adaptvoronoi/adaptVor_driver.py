@@ -3,9 +3,9 @@ import logging
 import numpy as np
 
 import westpa
-from westpa import extloader
-from westpa.yamlcfg import check_bool, ConfigItemMissing
-from westpa.binning import VoronoiBinMapper
+from westpa.core import extloader
+from westpa.core.yamlcfg import check_bool, ConfigItemMissing
+from westpa.core.binning import VoronoiBinMapper
 
 log = logging.getLogger(__name__)
 
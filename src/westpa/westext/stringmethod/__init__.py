@@ -6,12 +6,6 @@ Joshua L. Adelman 2011
 
 from abc import ABCMeta, abstractmethod, abstractproperty
 
-from . import string_method
-from .string_method import DefaultStringMethod
-
-from . import string_driver
-from .string_driver import StringDriver
-
 
 class WESTStringMethod:
 
@@ -41,4 +35,12 @@ class WESTStringMethod:
         pass
 
 
+# The implementations subclass WESTStringMethod, so they are imported once it is defined
+from . import string_method  # noqa: E402
+from .string_method import DefaultStringMethod  # noqa: E402
+
+from . import string_driver  # noqa: E402
+from .string_driver import StringDriver  # noqa: E402
+
+
 __all__ = ['string_method', 'DefaultStringMethod', 'string_driver', 'StringDriver']
@@ -1,6 +1,6 @@
 import numpy as np
 from .fourier_fitting import FourierFit
-from collections import Iterable
+from collections.abc import Iterable
 
 try:
     import scipy
@@ -11,7 +11,7 @@ try:
 except Exception:
     SCIPY_FLAG = False
 
-from westext.stringmethod import WESTStringMethod
+from westpa.westext.stringmethod import WESTStringMethod
 
 import logging
 
@@ -11,7 +11,7 @@ class ClusterList:
         self.ratios = ratios
 
         # Create an array to hold bin assignments and initial set all to -1 == not clustered
-        self.bin_assign = np.empty((nbins,), dtype=np.int)
+        self.bin_assign = np.empty((nbins,), dtype=np.int_)
         self.bin_assign.fill(-1)
 
         # Initialize an ucert container to hold per bin information; initially mask all elements
@@ -26,6 +26,9 @@ class ClusterList:
         """ Join clusters given a tuple (i,j) of bin pairs
         """
 
+        # Once a single cluster holds every bin that appears in pairs, all remaining pairs are no-ops
+        n_paired = len(np.union1d(*pairs))
+
         for i, j in zip(*pairs):
             # Both bins not joined
             if self.bin_assign[i] == -1 and self.bin_assign[j] == -1:
@@ -68,6 +71,9 @@ class ClusterList:
                 self.bin_assign[idum] = jclust
                 self.cluster_contents[jclust].update({idum})
 
+                if len(self.cluster_contents[jclust]) == n_paired:
+                    break
+
             # Both bins previously assigned to different cluster; Join clusters
             elif not self.bin_assign[i] == self.bin_assign[j]:
                 iclust = self.bin_assign[i]
@@ -106,13 +112,16 @@ class ClusterList:
                 # Clear contents of jclust
                 self.cluster_contents[jclust].clear()
 
-                if len(self.cluster_contents[iclust]) == self.nbins:
+                if len(self.cluster_contents[iclust]) == n_paired:
                     break
 
     def join_simple(self, pairs):
         """ Join clusters using direct ratios given a tuple (i,j) of bin pairs
         """
 
+        # Once a single cluster holds every bin that appears in pairs, all remaining pairs are no-ops
+        n_paired = len(np.union1d(*pairs))
+
         for i, j in zip(*pairs):
             # Both bins not joined
             if self.bin_assign[i] == -1 and self.bin_assign[j] == -1:
@@ -152,6 +161,9 @@ class ClusterList:
                 self.bin_assign[idum] = jclust
                 self.cluster_contents[jclust].update({idum})
 
+                if len(self.cluster_contents[jclust]) == n_paired:
+                    break
+
             # Both bins previously assigned to different cluster; Join clusters
             elif not self.bin_assign[i] == self.bin_assign[j]:
                 iclust = self.bin_assign[i]
@@ -178,5 +190,5 @@ class ClusterList:
                 # Clear contents of jclust
                 self.cluster_contents[jclust].clear()
 
-                if len(self.cluster_contents[iclust]) == self.nbins:
+                if len(self.cluster_contents[iclust]) == n_paired:
                     break
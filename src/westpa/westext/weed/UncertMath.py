@@ -61,7 +61,7 @@ class UncertContainer:
         if isinstance(vals, ma.core.MaskedConstant):
             dum = np.zeros((1,))
             return UncertContainer(dum.copy(), dum.copy(), dum.copy())
-        elif isinstance(vals, (float, int, np.float, np.int)):
+        elif isinstance(vals, (float, int)):
             return UncertContainer(np.array([vals]), np.array([dmin]), np.array([dmax]))
         elif isinstance(vals, np.ndarray):
             return UncertContainer(vals, dmin, dmax, mask=vals.mask)
@@ -90,7 +90,7 @@ class UncertContainer:
             dmax = self.dmax + value.dmax
 
             return UncertContainer(vals, dmin, dmax, mask=vals.mask)
-        elif isinstance(value, (float, int, np.float, np.int)):
+        elif isinstance(value, (float, int)):
             vals = self.vals + value
             dmin = self.dmin + value
             dmax = self.dmax + value
@@ -117,7 +117,7 @@ class UncertContainer:
 
             return UncertContainer(vals, dmin, dmax, mask=vals.mask)
 
-        elif isinstance(value, (float, int, np.float, np.int)):
+        elif isinstance(value, (float, int)):
             vals = self.vals * value
             dmin = self.dmin * value
             dmax = self.dmax * value
@@ -136,6 +136,8 @@ class UncertContainer:
         else:
             raise TypeError('Attempted to divide by unsupported type')
 
+    __truediv__ = __div__
+
     def transpose(self):
         vals = self.vals.T
         dmin = self.dmin.T
@@ -237,7 +239,7 @@ class UncertContainer:
 
         dev = 0.5 * np.sqrt(dsum / (norm * neff))
 
-        if isinstance(avg, (float, np.float)):
+        if isinstance(avg, float):
             avg = avg_ex
 
         tmp_min = avg - dev
@@ -1,17 +1,53 @@
 import logging
-import operator
+import math
 
 import numpy as np
 
 import westpa
-from westpa.yamlcfg import check_bool
-from westpa.kinetics import RateAverager
-from westext.weed.ProbAdjustEquil import probAdjustEquil
+from westpa.core.yamlcfg import check_bool
+from westpa.core.kinetics import RateAverager
+from .ProbAdjustEquil import probAdjustEquil
 
 EPS = np.finfo(np.float64).eps
 
+# Chunk cache used for the main HDF5 file when reweighting, unless the user configures a larger one;
+# the rate averager re-reads pcoord and seg_index chunks for every iteration in the averaging window
+default_chunk_cache_size = 64 * 1024 * 1024
+default_chunk_cache_slots = 1048583  # prime, as HDF5 recommends
+
+# Precision in which the averages are stored. Bin populations, fluxes and rates routinely fall
+# below the range of single precision, so it is available only on request (``storage_dtype``)
+default_storage_dtype = np.float64
+
 log = logging.getLogger(__name__)
 
+# Datasets stored in each iteration's weed group, and the RateAverager attributes they hold
+averager_datasets = (
+    ('avg_populations', 'average_populations'),
+    ('unc_populations', 'stderr_populations'),
+    ('avg_fluxes', 'average_flux'),
+    ('unc_fluxes', 'stderr_flux'),
+    ('avg_rates', 'average_rate'),
+    ('unc_rates', 'stderr_rate'),
+)
+
+
+def _bulk_reweight(bins, current_weights, new_weights):
+    '''Scale the walkers in each of ``bins`` so that the bins' total weights go from ``current_weights``
+    to ``new_weights``. This is equivalent to calling ``reweight()`` on each bin, but uses the bin weights
+    already on hand rather than summing each bin again before and after scaling it.'''
+
+    # The same sanity checks reweight() makes, for all bins at once
+    if np.any((current_weights == 0) & (new_weights != 0)):
+        raise ValueError('cannot reweight empty bin to nonzero probability')
+    assert (new_weights >= 0).all(), 'negative bin probability'
+
+    ratios = np.zeros_like(new_weights)
+    np.divide(new_weights, current_weights, out=ratios, where=(current_weights > 0))
+    for (bin, ratio) in zip(bins, ratios.tolist()):
+        for particle in bin:
+            particle.weight *= ratio
+
 
 class WEEDDriver:
     def __init__(self, sim_manager, plugin_config):
@@ -47,29 +83,73 @@ class WEEDDriver:
         if self.max_windowsize is not None:
             log.info('Using max windowsize of {:d}'.format(self.max_windowsize))
 
+        # The window settings are fixed for the life of the driver, so choose how to compute the
+        # effective window size for a given iteration once, here
+        windowsize = self.windowsize
+        max_windowsize = self.max_windowsize
+        if self.windowtype == 'fraction':
+            if max_windowsize is not None:
+                self.get_eff_windowsize = lambda n_iter: min(max_windowsize, int(n_iter * windowsize))
+            else:
+                self.get_eff_windowsize = lambda n_iter: int(n_iter * windowsize)
+        else:  # self.windowtype == 'fixed':
+            windowsize = windowsize or 0
+            self.get_eff_windowsize = lambda n_iter: min(n_iter, windowsize)
+
         self.reweight_period = plugin_config.get('reweight_period', 0)
         self.priority = plugin_config.get('priority', 0)
 
         self.rate_calc_queue_size = plugin_config.get('rate_calc_queue_size', 1)
         self.rate_calc_n_blocks = plugin_config.get('rate_calc_n_blocks', 1)
 
+        # Precision in which the averages are stored; they are always computed in double precision
+        self.storage_dtype = np.dtype(plugin_config.get('storage_dtype', default_storage_dtype))
+        if self.storage_dtype.kind != 'f':
+            raise ValueError(
+                'WEED parameter error -- storage dtype must be a floating point type, not {!r}'.format(self.storage_dtype)
+            )
+
+        # Rate averager kept between reweightings, so that iterations remaining in the averaging
+        # window are not re-read; valid only as long as the bin mapper (identified by hash) is unchanged
+        self.averager = None
+        self.averager_mapper_hash = None
+
+        # Iteration of the most recent reweighting, read from the HDF5 file on first use and
+        # tracked in memory afterwards, since only this driver updates it
+        self.last_reweighting = None
+
         if self.do_reweight:
+            # The chunk cache belongs to the file handle, which the data manager opens after plugins are
+            # loaded; this tunes the cache for the whole process, not just for WEED's own reads
+            self.chunk_cache_size = plugin_config.get('chunk_cache_size', default_chunk_cache_size)
+            self.chunk_cache_slots = plugin_config.get('chunk_cache_slots', default_chunk_cache_slots)
+            data_manager = self.data_manager
+            if self.chunk_cache_size is not None and (data_manager.we_h5file_chunk_cache_size or 0) < self.chunk_cache_size:
+                data_manager.we_h5file_chunk_cache_size = self.chunk_cache_size
+            if self.chunk_cache_slots is not None and (data_manager.we_h5file_chunk_cache_slots or 0) < self.chunk_cache_slots:
+                data_manager.we_h5file_chunk_cache_slots = self.chunk_cache_slots
+            if data_manager.we_h5file:
+                log.info('HDF5 file already open; WEED chunk cache settings take effect when it is next opened')
+
             sim_manager.register_callback(sim_manager.prepare_new_iteration, self.prepare_new_iteration, self.priority)
 
     def get_rates(self, n_iter, mapper):
         '''Get rates and associated uncertainties as of n_iter, according to the window size the user
         has selected (self.windowsize)'''
 
-        if self.windowtype == 'fraction':
-            if self.max_windowsize is not None:
-                eff_windowsize = min(self.max_windowsize, int(n_iter * self.windowsize))
-            else:
-                eff_windowsize = int(n_iter * self.windowsize)
-        else:  # self.windowtype == 'fixed':
-            eff_windowsize = min(n_iter, self.windowsize or 0)
+        eff_windowsize = self.get_eff_windowsize(n_iter)
 
-        averager = RateAverager(mapper, self.system, self.data_manager, self.work_manager)
-        averager.calculate(max(1, n_iter - eff_windowsize), n_iter + 1, self.rate_calc_n_blocks, self.rate_calc_queue_size)
+        mapper_hash = self.sim_manager.bin_mapper_hash
+        if mapper_hash and self.rate_calc_n_blocks == 1:
+            if self.averager is None or mapper_hash != self.averager_mapper_hash:
+                self.averager = RateAverager(mapper, self.system, self.data_manager, self.work_manager)
+                self.averager_mapper_hash = mapper_hash
+            averager = self.averager
+            averager.calculate_windowed(max(1, n_iter - eff_windowsize), n_iter + 1)
+        else:
+            # mapper cannot be identified between calls, or the calculation is to be distributed
+            averager = RateAverager(mapper, self.system, self.data_manager, self.work_manager)
+            averager.calculate(max(1, n_iter - eff_windowsize), n_iter + 1, self.rate_calc_n_blocks, self.rate_calc_queue_size)
         self.eff_windowsize = eff_windowsize
 
         return averager
@@ -87,11 +167,12 @@ class WEEDDriver:
             log.debug('equilibrium reweighting not enabled')
             return
 
-        with self.data_manager.lock:
-            weed_global_group = self.data_manager.we_h5file.require_group('weed')
-            last_reweighting = int(weed_global_group.attrs.get('last_reweighting', 0))
+        if self.last_reweighting is None:
+            with self.data_manager.lock:
+                weed_global_group = self.data_manager.we_h5file.require_group('weed')
+                self.last_reweighting = int(weed_global_group.attrs.get('last_reweighting', 0))
 
-        if n_iter - last_reweighting < self.reweight_period:
+        if n_iter - self.last_reweighting < self.reweight_period:
             # Not time to reweight yet
             log.debug('not reweighting')
             return
@@ -102,59 +183,64 @@ class WEEDDriver:
         bins = we_driver.next_iter_binning
         n_bins = len(bins)
 
-        # Create storage for ourselves
-        with self.data_manager.lock:
-            iter_group = self.data_manager.get_iter_group(n_iter)
-            try:
-                del iter_group['weed']
-            except KeyError:
-                pass
-
-            weed_iter_group = iter_group.create_group('weed')
-            avg_populations_ds = weed_iter_group.create_dataset('avg_populations', shape=(n_bins,), dtype=np.float64)
-            unc_populations_ds = weed_iter_group.create_dataset('unc_populations', shape=(n_bins,), dtype=np.float64)
-            avg_flux_ds = weed_iter_group.create_dataset('avg_fluxes', shape=(n_bins, n_bins), dtype=np.float64)
-            unc_flux_ds = weed_iter_group.create_dataset('unc_fluxes', shape=(n_bins, n_bins), dtype=np.float64)
-            avg_rates_ds = weed_iter_group.create_dataset('avg_rates', shape=(n_bins, n_bins), dtype=np.float64)
-            unc_rates_ds = weed_iter_group.create_dataset('unc_rates', shape=(n_bins, n_bins), dtype=np.float64)
+        # Gather bin weights once; the original weights are kept for checking and rescaling
+        binprobs = np.array([bin.weight for bin in bins], dtype=np.float64)
+        orig_binprobs = binprobs.copy()
 
         averager = self.get_rates(n_iter, mapper)
 
-        with self.data_manager.flushing_lock():
-            avg_populations_ds[...] = averager.average_populations
-            unc_populations_ds[...] = averager.stderr_populations
-            avg_flux_ds[...] = averager.average_flux
-            unc_flux_ds[...] = averager.stderr_flux
-            avg_rates_ds[...] = averager.average_rate
-            unc_rates_ds[...] = averager.stderr_rate
+        # Fetch each result from the averager once; the arrays are both stored and used for reweighting
+        averages = {dsname: getattr(averager, attrname) for (dsname, attrname) in averager_datasets}
 
-            binprobs = np.fromiter(map(operator.attrgetter('weight'), bins), dtype=np.float64, count=n_bins)
-            orig_binprobs = binprobs.copy()
+        # Store the averages for this iteration. Each dataset is written once, in full, and read back
+        # whole, so it is created directly from its data with HDF5's default contiguous layout (no
+        # chunking or compression), and only once the rates are actually available. Datasets left
+        # from an earlier attempt at this iteration are overwritten in place where possible, since
+        # HDF5 does not reclaim the space of deleted datasets
+        with self.data_manager.flushing_lock():
+            weed_iter_group = self.data_manager.get_iter_group(n_iter).require_group('weed')
+            for (dsname, data) in averages.items():
+                data = data.astype(self.storage_dtype, copy=False)
+                try:
+                    dataset = weed_iter_group[dsname]
+                except KeyError:
+                    pass
+                else:
+                    if dataset.shape == data.shape and dataset.dtype == self.storage_dtype:
+                        dataset[...] = data
+                        continue
+                    del weed_iter_group[dsname]
+                weed_iter_group.create_dataset(dsname, data=data)
 
         westpa.rc.pstatus('Calculating equilibrium reweighting using window size of {:d}'.format(self.eff_windowsize))
         westpa.rc.pstatus('\nBin probabilities prior to reweighting:\n{!s}'.format(binprobs))
         westpa.rc.pflush()
 
-        probAdjustEquil(binprobs, averager.average_rate, averager.stderr_rate)
+        probAdjustEquil(binprobs, averages['avg_rates'], averages['unc_rates'])
+
+        orig_empty = orig_binprobs == 0
+        new_empty = binprobs == 0
 
         # Check to see if reweighting has set non-zero bins to zero probability (should never happen)
-        assert (~((orig_binprobs > 0) & (binprobs == 0))).all(), 'populated bin reweighted to zero probability'
+        assert not (new_empty & ~orig_empty).any(), 'populated bin reweighted to zero probability'
 
         # Check to see if reweighting has set zero bins to nonzero probability (may happen)
-        z2nz_mask = (orig_binprobs == 0) & (binprobs > 0)
+        z2nz_mask = orig_empty & ~new_empty
         if (z2nz_mask).any():
             westpa.rc.pstatus('Reweighting would assign nonzero probability to an empty bin; not reweighting this iteration.')
             westpa.rc.pstatus('Empty bins assigned nonzero probability: {!s}.'.format(np.array_str(np.arange(n_bins)[z2nz_mask])))
         else:
             westpa.rc.pstatus('\nBin populations after reweighting:\n{!s}'.format(binprobs))
-            for (bin, newprob) in zip(bins, binprobs):
-                bin.reweight(newprob)
+            _bulk_reweight(bins, orig_binprobs, binprobs)
 
-            weed_global_group.attrs['last_reweighting'] = n_iter
+            with self.data_manager.lock:
+                self.data_manager.we_h5file.require_group('weed').attrs['last_reweighting'] = n_iter
+            self.last_reweighting = n_iter
 
-        assert (
-            abs(1 - np.fromiter(map(operator.attrgetter('weight'), bins), dtype=np.float64, count=n_bins).sum())
-            < EPS * np.fromiter(map(len, bins), dtype=np.int, count=n_bins).sum()
-        )
+        if __debug__:
+            # Sum the walker weights as they now stand; skipped entirely under python -O
+            total_weight = math.fsum(bin.weight for bin in bins)
+            n_segments = sum(len(bin) for bin in bins)
+            assert abs(1 - total_weight) < EPS * n_segments, 'total probability not conserved by reweighting'
 
         westpa.rc.pflush()
@@ -11,6 +11,7 @@ import logging
 import json
 import multiprocessing
 import os
+import pickle
 import re
 import signal
 import socket
@@ -42,6 +43,41 @@ signames = {
 
 DEFAULT_LINGER = 1
 
+# Buffers (e.g. numpy array data) at least this large are sent as separate message frames
+# alongside the pickle stream, avoiding copies into and out of the pickle itself. Requires
+# pickle protocol 5 (Python 3.8+); otherwise messages are sent as a single pickle.
+OOB_BUFFER_THRESHOLD = 65536
+
+
+def dump_message_frames(obj):
+    '''Pickle ``obj`` into a list of message frames: the pickle stream, followed by
+    any large buffers serialized out-of-band.'''
+
+    if pickle.HIGHEST_PROTOCOL < 5:
+        return [pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)]
+
+    buffers = []
+
+    def buffer_callback(buf):
+        if memoryview(buf).nbytes < OOB_BUFFER_THRESHOLD:
+            # keep small buffers in-band; a frame apiece costs more than the copy
+            return True
+        buffers.append(buf)
+        return False
+
+    return [pickle.dumps(obj, 5, buffer_callback=buffer_callback)] + buffers
+
+
+def load_message_frames(frames):
+    '''Unpickle an object from message frames produced by ``dump_message_frames``.'''
+
+    if len(frames) == 1:
+        return pickle.loads(frames[0])
+    else:
+        # received frames are read-only; copy out-of-band buffers once so that
+        # reconstructed arrays are writeable
+        return pickle.loads(frames[0], buffers=[bytearray(frame) for frame in frames[1:]])
+
 
 def randport(address='127.0.0.1'):
     '''Select a random unused TCP port number on the given address.'''
@@ -449,14 +485,14 @@ class ZMQCore:
         ``flags`` includes ``zmq.NOBLOCK``.'''
 
         if timeout is None or flags & zmq.NOBLOCK:
-            message = socket.recv_pyobj(flags)
+            message = load_message_frames(socket.recv_multipart(flags, copy=False))
         else:
             poller = zmq.Poller()
             poller.register(socket, zmq.POLLIN)
             try:
                 poll_results = dict(poller.poll(timeout=timeout))
                 if socket in poll_results:
-                    message = socket.recv_pyobj(flags)
+                    message = load_message_frames(socket.recv_multipart(flags, copy=False))
                 else:
                     raise ZMQWMTimeout('recv timed out')
             finally:
@@ -490,7 +526,11 @@ class ZMQCore:
         decorate the message with appropriate IDs, then delegate upward to actually send
         the message. ``message`` may either be a pre-constructed ``Message`` object or
         a message identifier, in which (latter) case ``payload`` will become the message payload.
-        ``payload`` is ignored if ``message`` is a ``Message`` object.'''
+        ``payload`` is ignored if ``message`` is a ``Message`` object.
+
+        Buffers in the message at least ``OOB_BUFFER_THRESHOLD`` bytes long (e.g. numpy array data)
+        are sent without copying, and ZeroMQ may still be reading them after this method returns.
+        Callers must therefore not modify a payload, or any array it refers to, once it has been sent.'''
 
         message = Message(message, payload)
         if message.master_id is None:
@@ -499,7 +539,7 @@ class ZMQCore:
 
         if self._super_debug:
             self.log.debug('sending {!r}'.format(message))
-        socket.send_pyobj(message, flags)
+        socket.send_multipart(dump_message_frames(message), flags, copy=False)
 
     def send_reply(self, socket, original_message, reply=Message.ACK, payload=None, flags=0):
         '''Send a reply to ``original_message`` on ``socket``. The reply message
@@ -618,11 +658,27 @@ class IsNode:
         filename = filename or 'zmq_host_info_{}.json'.format(self.node_id.hex)
         hostname = socket.gethostname()
 
-        with open(filename, 'wt') as infofile:
-            info = {}
-            info['rr_endpoint'] = re.sub(r'\*', hostname, self.downstream_rr_endpoint or '')
-            info['ann_endpoint'] = re.sub(r'\*', hostname, self.downstream_ann_endpoint or '')
-            json.dump(info, infofile)
+        info = {}
+        info['rr_endpoint'] = re.sub(r'\*', hostname, self.downstream_rr_endpoint or '')
+        info['ann_endpoint'] = re.sub(r'\*', hostname, self.downstream_ann_endpoint or '')
+
+        # Write to a temporary file alongside the target and rename it into place, so that
+        # clients polling for this file never read a partially-written copy
+        (fd, tmp_filename) = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filename)), suffix='.tmp')
+        try:
+            # mkstemp creates the file readable only by its owner; give it the permissions open() would,
+            # so that workers running as other users can read it
+            umask = os.umask(0)
+            os.umask(umask)
+            os.fchmod(fd, 0o666 & ~umask)
+            with os.fdopen(fd, 'wt') as infofile:
+                json.dump(info, infofile)
+                infofile.flush()
+                os.fsync(infofile.fileno())
+            os.replace(tmp_filename, filename)
+        except BaseException:
+            os.unlink(tmp_filename)
+            raise
         self.host_info_files.append(filename)
 
     def startup(self):
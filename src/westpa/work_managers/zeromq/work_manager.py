@@ -232,7 +232,8 @@ class ZMQWorkManager(ZMQCore, WorkManager, IsNode):
 
     @classmethod
     def read_host_info(cls, filename):
-        return json.load(open(filename, 'rt'))
+        with open(filename, 'rt') as infofile:
+            return json.load(infofile)
 
     @classmethod
     def canonicalize_endpoint(cls, endpoint, allow_wildcard_host=True):
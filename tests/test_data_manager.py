@@ -0,0 +1,384 @@
+import os
+import shutil
+import types
+
+import numpy as np
+import pytest
+
+import westpa
+from westpa.core.binning import RectilinearBinMapper
+from westpa.core.data_manager import WESTDataManager, contiguous_runs, summary_table_dtype
+from westpa.core.segment import Segment
+from westpa.tools.binning import mapper_from_hdf5
+
+REF_3ITER_H5 = os.path.join(os.path.dirname(__file__), 'test_tools', 'ref', 'west_3iter.h5')
+
+
+class DataManagerTest:
+    def setup(self):
+        westpa.rc.config = westpa.core.yamlcfg.YAMLConfig()
+
+    def teardown(self):
+        westpa.rc.config = westpa.core.yamlcfg.YAMLConfig()
+
+
+class TestBinMappers(DataManagerTest):
+    def open_data_manager(self, h5_filename, mode):
+        data_manager = WESTDataManager()
+        data_manager.we_h5filename = h5_filename
+        data_manager.open_backing(mode)
+        return data_manager
+
+    def test_save_bin_mapper_twice(self, tmp_path):
+        '''Saving the same mapper twice stores it once, and the stored mapper can be loaded back'''
+
+        h5_filename = str(tmp_path / 'west.h5')
+        mapper = RectilinearBinMapper([[0.0, 1.0, 2.0, 3.0]])
+        other_mapper = RectilinearBinMapper([[0.0, 0.5, 1.0]])
+        (pickle_data, hashval) = mapper.pickle_and_hash()
+        (other_pickle_data, other_hashval) = other_mapper.pickle_and_hash()
+
+        data_manager = self.open_data_manager(h5_filename, 'w')
+        try:
+            with pytest.raises(KeyError):
+                data_manager.find_bin_mapper(hashval)
+
+            index = data_manager.save_bin_mapper(hashval, pickle_data)
+            assert data_manager.save_bin_mapper(hashval, pickle_data) == index
+            assert len(data_manager.we_h5file['/bin_topologies/index']) == 1
+
+            other_index = data_manager.save_bin_mapper(other_hashval, other_pickle_data)
+            assert other_index != index
+            assert data_manager.save_bin_mapper(hashval, pickle_data) == index
+            assert len(data_manager.we_h5file['/bin_topologies/index']) == 2
+
+            assert data_manager.find_bin_mapper(hashval) == index
+            assert data_manager.get_bin_mapper(hashval).pickle_and_hash()[1] == hashval
+        finally:
+            data_manager.close_backing()
+
+        # A fresh data manager finds the same entries in the file
+        data_manager = self.open_data_manager(h5_filename, 'r+')
+        try:
+            assert data_manager.find_bin_mapper(hashval) == index
+            assert data_manager.find_bin_mapper(other_hashval) == other_index
+            assert data_manager.save_bin_mapper(hashval, pickle_data) == index
+            assert len(data_manager.we_h5file['/bin_topologies/index']) == 2
+
+            loaded_mapper = data_manager.get_bin_mapper(hashval)
+            assert loaded_mapper.pickle_and_hash()[1] == hashval
+            assert np.array_equal(loaded_mapper.boundaries[0], mapper.boundaries[0])
+        finally:
+            data_manager.close_backing()
+
+    def test_find_bin_mapper_stored_elsewhere(self, tmp_path):
+        '''A mapper stored after the hash index was first scanned, by another writer, is still found'''
+
+        mapper = RectilinearBinMapper([[0.0, 1.0, 2.0, 3.0]])
+        other_mapper = RectilinearBinMapper([[0.0, 0.5, 1.0]])
+        (pickle_data, hashval) = mapper.pickle_and_hash()
+        (other_pickle_data, other_hashval) = other_mapper.pickle_and_hash()
+
+        data_manager = self.open_data_manager(str(tmp_path / 'west.h5'), 'w')
+        try:
+            index = data_manager.save_bin_mapper(hashval, pickle_data)
+            assert data_manager.find_bin_mapper(hashval) == index
+
+            # Another writer on the same file, with its own hash index
+            other_writer = WESTDataManager()
+            other_writer.we_h5file = data_manager.we_h5file
+            other_index = other_writer.save_bin_mapper(other_hashval, other_pickle_data)
+
+            assert data_manager.find_bin_mapper(other_hashval) == other_index
+            assert data_manager.get_bin_mapper(other_hashval).pickle_and_hash()[1] == other_hashval
+            with pytest.raises(KeyError):
+                data_manager.find_bin_mapper('0' * len(hashval))
+        finally:
+            data_manager.close_backing()
+
+    def test_mapper_from_hdf5(self, tmp_path):
+        '''mapper_from_hdf5 finds a mapper by its hex digest, although hashes are stored as bytes'''
+
+        mapper = RectilinearBinMapper([[0.0, 1.0, 2.0, 3.0]])
+        (pickle_data, hashval) = mapper.pickle_and_hash()
+
+        data_manager = self.open_data_manager(str(tmp_path / 'west.h5'), 'w')
+        try:
+            data_manager.save_bin_mapper(hashval, pickle_data)
+            topol_group = data_manager.we_h5file['/bin_topologies']
+
+            (loaded_mapper, loaded_pickle, loaded_hashval) = mapper_from_hdf5(topol_group, hashval)
+            assert loaded_hashval == hashval
+            assert loaded_pickle == pickle_data
+            assert loaded_mapper.pickle_and_hash()[1] == hashval
+
+            with pytest.raises(KeyError):
+                mapper_from_hdf5(topol_group, '0' * len(hashval))
+        finally:
+            data_manager.close_backing()
+
+
+class TestCurrentIteration(DataManagerTest):
+    def make_data_manager(self, h5_filename):
+        data_manager = WESTDataManager()
+        data_manager.we_h5filename = h5_filename
+        return data_manager
+
+    def test_writer_current_iteration(self, tmp_path):
+        '''The current iteration set by a writer is read back, both before and after reopening the file'''
+
+        h5_filename = str(tmp_path / 'west.h5')
+        data_manager = self.make_data_manager(h5_filename)
+        data_manager.prepare_backing()
+        try:
+            assert data_manager.current_iteration == 0
+            data_manager.current_iteration = 3
+            assert data_manager.current_iteration == 3
+            assert data_manager.we_h5file['/'].attrs['west_current_iteration'] == 3
+        finally:
+            data_manager.close_backing()
+
+        data_manager.open_backing('r+')
+        try:
+            assert data_manager.current_iteration == 3
+            data_manager.current_iteration = 4
+            assert data_manager.current_iteration == 4
+        finally:
+            data_manager.close_backing()
+
+    def test_reader_current_iteration(self, tmp_path):
+        '''A data manager reading a file sees the current iteration as the writer advances it'''
+
+        h5_filename = str(tmp_path / 'west.h5')
+        writer = self.make_data_manager(h5_filename)
+        writer.prepare_backing()
+        reader = self.make_data_manager(h5_filename)
+        reader.open_backing('r')
+        try:
+            assert reader.current_iteration == 0
+            for n_iter in (1, 2, 3):
+                writer.current_iteration = n_iter
+                assert reader.current_iteration == n_iter
+        finally:
+            reader.close_backing()
+            writer.close_backing()
+
+
+class TestIterSummary(DataManagerTest):
+    def make_summary(self, n_iter):
+        summary = np.zeros((), dtype=summary_table_dtype)
+        summary['n_particles'] = 10 * n_iter
+        summary['norm'] = 1.0
+        summary['walltime'] = 0.5 * n_iter
+        return summary
+
+    def test_iter_summary(self, tmp_path):
+        '''Iteration summaries read back as written, across iterations and after reopening the file'''
+
+        data_manager = WESTDataManager()
+        data_manager.we_h5filename = str(tmp_path / 'west.h5')
+        data_manager.prepare_backing()
+        try:
+            for n_iter in (1, 2, 3):
+                data_manager.we_h5file['summary'].resize((n_iter + 1,))
+                data_manager.current_iteration = n_iter
+                data_manager.update_iter_summary(self.make_summary(n_iter))
+                assert data_manager.get_iter_summary() == self.make_summary(n_iter)
+
+                # Callers modify the returned row before writing it back
+                summary = data_manager.get_iter_summary(n_iter)
+                summary['cputime'] = 2.0 * n_iter
+                assert data_manager.get_iter_summary(n_iter)['cputime'] == 0.0
+                data_manager.update_iter_summary(summary, n_iter)
+                assert data_manager.get_iter_summary(n_iter) == summary
+
+            for n_iter in (1, 2, 3):
+                assert data_manager.get_iter_summary(n_iter)['n_particles'] == 10 * n_iter
+                assert data_manager.get_iter_summary(n_iter)['cputime'] == 2.0 * n_iter
+
+            # Rewrite an earlier iteration, then the latest again
+            data_manager.update_iter_summary(self.make_summary(5), 2)
+            assert data_manager.get_iter_summary(2) == self.make_summary(5)
+            assert data_manager.get_iter_summary(3)['cputime'] == 6.0
+        finally:
+            data_manager.close_backing()
+
+        for mode in ('r', 'r+'):
+            data_manager.open_backing(mode)
+            try:
+                assert data_manager.get_iter_summary(1)['n_particles'] == 10
+                assert data_manager.get_iter_summary(2) == self.make_summary(5)
+                assert data_manager.get_iter_summary()['cputime'] == 6.0
+            finally:
+                data_manager.close_backing()
+
+    def test_reader_iter_summary(self, tmp_path):
+        '''A data manager reading a file sees iteration summaries as the writer updates them'''
+
+        h5_filename = str(tmp_path / 'west.h5')
+        writer = WESTDataManager()
+        writer.we_h5filename = h5_filename
+        writer.prepare_backing()
+        writer.we_h5file['summary'].resize((3,))
+        reader = WESTDataManager()
+        reader.we_h5filename = h5_filename
+        reader.open_backing('r')
+        try:
+            for n_iter in (1, 2):
+                writer.update_iter_summary(self.make_summary(n_iter), n_iter)
+                assert reader.get_iter_summary(n_iter) == self.make_summary(n_iter)
+
+            summary = self.make_summary(2)
+            summary['cputime'] = 4.0
+            writer.update_iter_summary(summary, 2)
+            assert reader.get_iter_summary(2)['cputime'] == 4.0
+        finally:
+            reader.close_backing()
+            writer.close_backing()
+
+
+class TestAuxFiles(DataManagerTest):
+    def test_aux_files_per_data_manager(self, tmp_path):
+        '''Each data manager keeps its own auxiliary files open, and closing its backing closes only those'''
+
+        data_managers = []
+        for name in ('a', 'b'):
+            data_manager = WESTDataManager()
+            data_manager.we_h5filename = str(tmp_path / 'west_{}.h5'.format(name))
+            data_manager.open_backing('w')
+            data_managers.append(data_manager)
+        (dm_a, dm_b) = data_managers
+
+        aux_filename = str(tmp_path / 'aux_a.h5')
+        h5_auxfile = dm_a.get_aux_file(aux_filename)
+        assert dm_a.get_aux_file(aux_filename) is h5_auxfile
+        assert list(dm_a._aux_files) == [aux_filename]
+        assert not dm_b._aux_files
+
+        dm_b.close_backing()
+        assert h5_auxfile
+
+        dm_a.close_backing()
+        assert not h5_auxfile
+        assert not dm_a._aux_files
+
+    def test_max_open_aux_files(self, tmp_path):
+        '''Only the most recently used auxiliary files are kept open'''
+
+        data_manager = WESTDataManager()
+        data_manager.max_open_aux_files = 2
+        aux_files = [data_manager.get_aux_file(str(tmp_path / 'aux_{:d}.h5'.format(i))) for i in range(3)]
+
+        assert [bool(h5_auxfile) for h5_auxfile in aux_files] == [False, True, True]
+        assert len(data_manager._aux_files) == 2
+        data_manager.close_aux_files()
+
+
+class TestContiguousRuns:
+    def test_contiguous_runs(self):
+        assert contiguous_runs([]) == []
+        assert contiguous_runs(np.array([], dtype=np.int64)) == []
+        assert contiguous_runs([7]) == [(7, 1)]
+        assert contiguous_runs(range(5)) == [(0, 5)]
+        assert contiguous_runs([0, 1, 2, 5, 6, 9]) == [(0, 3), (5, 2), (9, 1)]
+
+    def test_contiguous_runs_unsorted_or_repeated(self):
+        '''Unsorted or repeated indices start new runs, and the runs still cover every index in order'''
+
+        assert contiguous_runs([3, 1, 2]) == [(3, 1), (1, 2)]
+        assert contiguous_runs([2, 2, 3]) == [(2, 1), (2, 2)]
+        assert contiguous_runs([5, 4, 3]) == [(5, 1), (4, 1), (3, 1)]
+
+        indices = [4, 5, 6, 6, 0, 1, 9, 8]
+        runs = contiguous_runs(indices)
+        assert [first + i for (first, run_len) in runs for i in range(run_len)] == indices
+
+
+class TestSegments(DataManagerTest):
+    n_iter = 2
+
+    def open_ref_copy(self, tmp_path, mode='r+'):
+        h5_filename = str(tmp_path / 'west.h5')
+        shutil.copyfile(REF_3ITER_H5, h5_filename)
+
+        data_manager = WESTDataManager()
+        data_manager.we_h5filename = h5_filename
+        data_manager.open_backing(mode)
+
+        pcoord_ds = data_manager.get_iter_group(self.n_iter)['pcoord']
+        data_manager.system = types.SimpleNamespace(
+            pcoord_len=pcoord_ds.shape[1], pcoord_ndim=pcoord_ds.shape[2], pcoord_dtype=pcoord_ds.dtype
+        )
+        return data_manager
+
+    def test_update_segments_subset(self, tmp_path):
+        '''Updating a non-contiguous, unordered subset of segments writes exactly those rows'''
+
+        data_manager = self.open_ref_copy(tmp_path)
+        try:
+            iter_group = data_manager.get_iter_group(self.n_iter)
+            orig_seg_index = iter_group['seg_index'][...]
+            orig_pcoord = iter_group['pcoord'][...]
+            n_segments = len(orig_seg_index)
+
+            seg_ids = [17, 3, 0, 4, 5, n_segments - 1]
+            segments = data_manager.get_segments(self.n_iter, seg_ids)
+            for segment in segments:
+                segment.status = Segment.SEG_STATUS_FAILED
+                segment.endpoint_type = Segment.SEG_ENDPOINT_MERGED
+                segment.cputime = 100.0 + segment.seg_id
+                segment.walltime = 200.0 + segment.seg_id
+                segment.weight = 1e-3 * (segment.seg_id + 1)
+                segment.pcoord = np.full_like(segment.pcoord, -segment.seg_id)
+            data_manager.update_segments(self.n_iter, segments[::-1])
+
+            seg_index = iter_group['seg_index'][...]
+            pcoord = iter_group['pcoord'][...]
+            for seg_id in range(n_segments):
+                if seg_id in seg_ids:
+                    assert seg_index[seg_id]['status'] == Segment.SEG_STATUS_FAILED
+                    assert seg_index[seg_id]['endpoint_type'] == Segment.SEG_ENDPOINT_MERGED
+                    assert seg_index[seg_id]['cputime'] == 100.0 + seg_id
+                    assert seg_index[seg_id]['walltime'] == 200.0 + seg_id
+                    assert seg_index[seg_id]['weight'] == 1e-3 * (seg_id + 1)
+                    assert (pcoord[seg_id] == -seg_id).all()
+                    # parent and weight transfer information is kept
+                    for field in ('parent_id', 'wtg_n_parents', 'wtg_offset'):
+                        assert seg_index[seg_id][field] == orig_seg_index[seg_id][field]
+                else:
+                    assert seg_index[seg_id] == orig_seg_index[seg_id]
+                    # pcoord is stored with a 4-digit scale/offset filter, so rewriting a chunk
+                    # requantizes the untouched rows in it
+                    assert np.allclose(pcoord[seg_id], orig_pcoord[seg_id], rtol=0, atol=1e-4)
+        finally:
+            data_manager.close_backing()
+
+    def test_get_segments_subset(self, tmp_path):
+        '''A sparse subset of segments reads the same as those segments from a full read'''
+
+        data_manager = self.open_ref_copy(tmp_path, mode='r')
+        try:
+            for n_iter in (1, 2, 3):
+                all_segments = data_manager.get_segments(n_iter)
+                n_segments = len(all_segments)
+                multiple_parents = [segment.seg_id for segment in all_segments if len(segment.wtg_parent_ids) > 1]
+                subsets = [
+                    [n_segments - 1, 0],
+                    [1, 7, 8],
+                    [n_segments // 2],
+                    list(range(1, n_segments, 5)),
+                    multiple_parents[::-2] + [2],
+                ]
+                for seg_ids in subsets:
+                    segments = data_manager.get_segments(n_iter, seg_ids)
+                    assert [segment.seg_id for segment in segments] == sorted(seg_ids)
+                    for segment in segments:
+                        ref_segment = all_segments[segment.seg_id]
+                        assert segment.n_iter == ref_segment.n_iter == n_iter
+                        assert segment.parent_id == ref_segment.parent_id
+                        assert segment.wtg_parent_ids == ref_segment.wtg_parent_ids
+                        for attr in ('status', 'endpoint_type', 'weight', 'cputime', 'walltime'):
+                            assert getattr(segment, attr) == getattr(ref_segment, attr), attr
+                        assert np.array_equal(segment.pcoord, ref_segment.pcoord)
+        finally:
+            data_manager.close_backing()
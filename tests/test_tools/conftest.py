@@ -39,12 +39,11 @@ def ref_3iter(request):
 @pytest.fixture
 def ref_cfg(request):
     """
-    Fixture that prepares a simulation directory with a populated west.cfg file.
+    Fixture that prepares a simulation directory with a populated west.cfg file,
+    without changing the working directory.
     """
 
-    os.chdir(REFERENCE_PATH)
-
-    copyfile(REF_CFG_FILENAME, CFG_FILENAME)
+    copyfile(os.path.join(REFERENCE_PATH, REF_CFG_FILENAME), os.path.join(REFERENCE_PATH, CFG_FILENAME))
 
     request.cls.cfg_filepath = os.path.join(REFERENCE_PATH, CFG_FILENAME)
     request.cls.h5_filepath = os.path.join(REFERENCE_PATH, H5_FILENAME)
@@ -78,8 +77,8 @@ def ref_initialized(request):
 
 def clear_state():
 
-    os.remove(CFG_FILENAME)
-    os.remove(H5_FILENAME)
+    os.remove(os.path.join(REFERENCE_PATH, CFG_FILENAME))
+    os.remove(os.path.join(REFERENCE_PATH, H5_FILENAME))
 
     os.chdir(STARTING_PATH)
 
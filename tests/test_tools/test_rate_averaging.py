@@ -0,0 +1,73 @@
+import numpy as np
+
+import westpa
+from westpa.core.kinetics import RateAverager
+from westpa.westext.weed import WEEDDriver
+
+RESULT_ATTRS = [
+    'average_flux',
+    'stderr_flux',
+    'average_populations',
+    'stderr_populations',
+    'average_rate',
+    'stderr_rate',
+]
+
+
+class Test_RateAverager:
+    def setup_averaging(self):
+        westpa.rc.read_config(self.cfg_filepath)
+        westpa.rc.process_config()
+
+        self.system = westpa.rc.get_system_driver()
+        self.data_manager = westpa.rc.get_data_manager()
+        self.data_manager.open_backing('r')
+
+    def assert_same_results(self, averager, ref_averager):
+        for attr in RESULT_ATTRS:
+            assert np.array_equal(getattr(averager, attr), getattr(ref_averager, attr)), attr
+
+    def test_calculate_windowed(self, ref_3iter):
+        '''Tests that windowed averaging over overlapping windows matches a full calculation of each window'''
+
+        self.setup_averaging()
+        try:
+            averager = RateAverager(self.system.bin_mapper, self.system, self.data_manager)
+            for (iter_start, iter_stop) in [(1, 3), (1, 4), (2, 4), (3, 4), (2, 4), (1, 4)]:
+                averager.calculate_windowed(iter_start, iter_stop)
+                assert sorted(averager.iter_cache) == list(range(iter_start, iter_stop))
+
+                ref_averager = RateAverager(self.system.bin_mapper, self.system, self.data_manager)
+                ref_averager.calculate(iter_start, iter_stop)
+                self.assert_same_results(averager, ref_averager)
+        finally:
+            self.data_manager.close_backing()
+
+    def test_weed_averager_reset_on_new_mapper(self, ref_3iter):
+        '''Tests that the WEED driver keeps its rate averager only while the bin mapper is unchanged'''
+
+        self.setup_averaging()
+        try:
+            sim_manager = westpa.rc.get_sim_manager()
+            weed = WEEDDriver(sim_manager, {'do_equilibrium_reweighting': True, 'window_size': 0.75})
+            mapper = self.system.bin_mapper
+
+            sim_manager.bin_mapper_hash = 'mapper-a'
+            averager = weed.get_rates(3, mapper)
+            assert weed.get_rates(3, mapper) is averager
+
+            # Poison the cached iterations; a new mapper must not reuse them
+            for (flux_matrix, population_vector) in averager.iter_cache.values():
+                flux_matrix.fill(np.nan)
+                population_vector.fill(np.nan)
+
+            sim_manager.bin_mapper_hash = 'mapper-b'
+            new_averager = weed.get_rates(3, mapper)
+            assert new_averager is not averager
+            assert sorted(new_averager.iter_cache) == [1, 2, 3]
+
+            ref_averager = RateAverager(mapper, self.system, self.data_manager)
+            ref_averager.calculate(1, 4)
+            self.assert_same_results(new_averager, ref_averager)
+        finally:
+            self.data_manager.close_backing()
@@ -1,8 +1,10 @@
-import argparse
+import os
+
+import westpa
 
 from .hdiff import H5Diff
 
-from westpa.cli.core.w_init import entry_point
+from westpa.cli.core.w_init import entry_point, initialize
 from unittest import mock
 
 
@@ -10,22 +12,13 @@ class Test_W_Init:
     def test_run_w_init(self, ref_cfg):
         '''Tests initialization of a WESTPA simulation system from a prebuilt .cfg'''
 
-        with mock.patch(
-            target='argparse.ArgumentParser.parse_args',
-            return_value=argparse.Namespace(
-                force=True,
-                rcfile=self.cfg_filepath,
-                bstate_file=None,
-                verbosity='0',
-                bstates=['initial,1.0'],
-                tstate_file=None,
-                tstates=None,
-                segs_per_state=1,
-                shotgun=False,
-            ),
-        ):
+        # Configure directly rather than through the command line; the data file is named by its
+        # absolute path, so the test does not depend on the working directory
+        westpa.rc.read_config(self.cfg_filepath)
+        westpa.rc.config['west', 'data', 'west_data_file'] = self.h5_filepath
+        westpa.rc.process_config()
 
-            entry_point()
+        initialize(tstates=None, tstate_file=None, bstates=['initial,1.0'], bstate_file=None, segs_per_state=1, shotgun=False)
 
         # h5 files contain some internal information that includes timestamps, so I can't just compare md5 checksums
         #   to ensure that w_init is producing the same output.
@@ -33,3 +26,16 @@ class Test_W_Init:
         # If the checked contents differ, an AssertionError will be raised.
         diff = H5Diff(self.ref_h5_filepath, self.h5_filepath)
         diff.check()
+
+    def test_run_w_init_entry_point(self, ref_cfg, monkeypatch):
+        '''Tests initialization of a WESTPA simulation system through the w_init command line'''
+
+        # The configured west_data_file is relative to the simulation directory
+        monkeypatch.chdir(os.path.dirname(self.cfg_filepath))
+
+        argv = ['w_init', '-r', self.cfg_filepath, '--force', '--bstate', 'initial,1.0', '--segs-per-state', '1']
+        with mock.patch('sys.argv', argv):
+            entry_point()
+
+        diff = H5Diff(self.ref_h5_filepath, self.h5_filepath)
+        diff.check()
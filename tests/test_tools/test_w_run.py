@@ -1,6 +1,9 @@
 import argparse
 
 import h5py
+import pytest
+
+import westpa
 
 from westpa.cli.core.w_run import entry_point
 from unittest import mock
@@ -43,3 +46,35 @@ class Test_W_Run:
         _hfile = h5py.File(self.h5_filepath)
         assert 'iter_00000003' in _hfile['/iterations'].keys()
         _hfile.close()
+
+    def test_post_iter_error(self, ref_initialized):
+        '''Tests that an error in the propagator's post-iteration step ends the run in that iteration'''
+
+        westpa.rc.read_config(self.cfg_filepath)
+        westpa.rc.process_config()
+
+        sim_manager = westpa.rc.get_sim_manager()
+        data_manager = westpa.rc.get_data_manager()
+        propagator = westpa.rc.get_propagator()
+        propagator.system = data_manager.system = sim_manager.we_driver.system = westpa.rc.get_system_driver()
+        sim_manager.propagator = propagator
+
+        prepared_iters = []
+        propagator.prepare_iteration = lambda n_iter, segments: prepared_iters.append(n_iter)
+
+        def failing_finalize_iteration(n_iter, segments):
+            raise RuntimeError('post_iter failed in iteration {:d}'.format(n_iter))
+
+        propagator.finalize_iteration = failing_finalize_iteration
+
+        sim_manager.prepare_run()
+        try:
+            with pytest.raises(RuntimeError, match='iteration 1$'):
+                sim_manager.run()
+        finally:
+            data_manager.close_backing()
+
+        # Iteration 1 was not recorded as complete, and iteration 2 was never started
+        assert prepared_iters == [1]
+        with h5py.File(self.h5_filepath, 'r') as h5file:
+            assert h5file['/'].attrs['west_current_iteration'] == 1
@@ -0,0 +1,162 @@
+import argparse
+import copy
+import os
+
+import numpy as np
+import pytest
+
+import westpa
+from westpa.core.binning.bins import Bin
+from westpa.core.segment import Segment
+from westpa.westext.weed import WEEDDriver, probAdjustEquil
+from westpa.westext.weed.weed_driver import _bulk_reweight
+from westpa.westext.weed.BinCluster import ClusterList
+from westpa.westext.weed.UncertMath import UncertContainer
+
+
+class TestWEEDPlugin:
+    def setup(self):
+
+        parser = argparse.ArgumentParser()
+        westpa.rc.add_args(parser)
+
+        here = os.path.dirname(__file__)
+        os.environ['WEST_SIM_ROOT'] = os.path.join(here, 'fixtures', 'odld')
+
+        config_file_name = os.path.join(here, 'fixtures', 'odld', 'west.cfg')
+        args = parser.parse_args(['-r={}'.format(config_file_name)])
+        westpa.rc.process_args(args)
+        westpa.rc.config['west', 'plugins'] = [
+            {'plugin': 'westpa.westext.weed.WEEDDriver', 'do_equilibrium_reweighting': True, 'window_size': 0.75}
+        ]
+        self.sim_manager = westpa.rc.get_sim_manager()
+
+    def teardown(self):
+        westpa.rc._sim_manager = None
+        westpa.rc._system = None
+        westpa.rc._data_manager = None
+        westpa.rc._we_driver = None
+        westpa.rc._propagator = None
+        westpa.rc.config = westpa.core.yamlcfg.YAMLConfig()
+        del os.environ['WEST_SIM_ROOT']
+
+    def test_load_plugin(self):
+        '''WEEDDriver loads through the plugin mechanism and hooks prepare_new_iteration'''
+
+        self.sim_manager.load_plugins()
+
+        callbacks = self.sim_manager._callback_table.get(self.sim_manager.prepare_new_iteration, [])
+        assert len(callbacks) == 1
+
+        (priority, name, fn) = next(iter(callbacks))
+        assert name == 'prepare_new_iteration'
+        assert isinstance(fn.__self__, WEEDDriver)
+        assert fn.__self__.windowsize == 0.75
+
+
+class CountingIndices:
+    '''A sequence of bin indices that records how many of them have been iterated over'''
+
+    def __init__(self, indices):
+        self.indices = np.array(indices)
+        self.n_consumed = 0
+
+    def __array__(self, dtype=None):
+        return self.indices if dtype is None else self.indices.astype(dtype)
+
+    def __iter__(self):
+        for index in self.indices:
+            self.n_consumed += 1
+            yield index
+
+
+class TestProbAdjustEquil:
+    def test_prob_adjust_equil(self):
+        '''Reweighting a linear chain of bins gives the populations in detailed balance with its rates'''
+
+        # 0 <-> 1 <-> 2, and bin 3 empty; equilibrium is p1/p0 = k01/k10 and p2/p1 = k12/k21
+        rates = np.array([[0.0, 0.2, 0.0, 0.0], [0.1, 0.0, 0.3, 0.0], [0.0, 0.1, 0.0, 0.0], [0.0, 0.0, 0.0, 0.0]])
+        uncert = 0.1 * rates
+        binprobs = np.array([0.25, 0.25, 0.5, 0.0])
+
+        probAdjustEquil(binprobs, rates, uncert)
+
+        expected = np.array([1.0, 2.0, 6.0, 0.0])
+        expected /= expected.sum()
+        assert np.allclose(binprobs, expected)
+        assert binprobs[3] == 0.0
+
+    def test_join_simple_stops_when_paired_bins_clustered(self):
+        '''Clustering stops once every paired bin is in one cluster, even when other bins are never paired'''
+
+        p = np.array([0.1, 0.2, 0.3, 0.4])
+        ratios = np.divide.outer(p, p)
+        ratios = UncertContainer(ratios, 0.9 * ratios, 1.1 * ratios)
+
+        # Bin 3 is never paired, so no cluster can hold all nbins bins
+        pairs = (CountingIndices([0, 1, 0, 0]), CountingIndices([1, 2, 2, 1]))
+        clusters = ClusterList(ratios, 4)
+        clusters.join_simple(pairs)
+
+        assert pairs[0].n_consumed == 2
+        assert clusters.cluster_contents[0] == {0, 1, 2}
+        assert np.allclose(clusters.bin_data[[0, 1, 2]].vals, p[:3] / p[:3].sum())
+
+    def test_join_stops_when_paired_bins_clustered(self):
+        '''ClusterList.join stops once every paired bin is in one cluster, as join_simple does'''
+
+        p = np.array([0.1, 0.2, 0.3, 0.4])
+        ratios = np.divide.outer(p, p)
+        ratios = UncertContainer(ratios, 0.9 * ratios, 1.1 * ratios)
+
+        pairs = (CountingIndices([0, 1, 0, 0]), CountingIndices([1, 2, 2, 1]))
+        clusters = ClusterList(ratios, 4)
+        clusters.join(pairs)
+
+        assert pairs[0].n_consumed == 2
+        assert clusters.cluster_contents[0] == {0, 1, 2}
+        assert np.allclose(clusters.bin_data[[0, 1, 2]].vals, p[:3] / p[:3].sum())
+
+
+class TestBulkReweight:
+    def make_bins(self):
+        weights = [[0.05, 0.15], [], [0.1, 0.1, 0.2], [], [0.4]]
+        seg_id = 0
+        bins = []
+        for bin_weights in weights:
+            bin = Bin()
+            for weight in bin_weights:
+                bin.add(Segment(n_iter=1, seg_id=seg_id, weight=weight))
+                seg_id += 1
+            bins.append(bin)
+        return bins
+
+    def test_bulk_reweight(self):
+        '''Bulk reweighting gives the same walker weights as reweighting each bin, including empty bins'''
+
+        bins = self.make_bins()
+        ref_bins = copy.deepcopy(bins)
+
+        current_weights = np.array([bin.weight for bin in bins])
+        new_weights = np.array([0.3, 0.0, 0.25, 0.0, 0.45])
+
+        _bulk_reweight(bins, current_weights, new_weights)
+        for (bin, new_weight) in zip(ref_bins, new_weights):
+            bin.reweight(new_weight)
+
+        weights = sorted((segment.seg_id, segment.weight) for bin in bins for segment in bin)
+        ref_weights = sorted((segment.seg_id, segment.weight) for bin in ref_bins for segment in bin)
+        assert weights == ref_weights
+        assert np.allclose([bin.weight for bin in bins], new_weights)
+
+    def test_bulk_reweight_empty_bin(self):
+        '''Assigning probability to an empty bin is an error, as it is for a single bin'''
+
+        bins = self.make_bins()
+        current_weights = np.array([bin.weight for bin in bins])
+        new_weights = np.array([0.3, 0.05, 0.2, 0.0, 0.45])
+
+        with pytest.raises(ValueError):
+            _bulk_reweight(bins, current_weights, new_weights)
+        with pytest.raises(ValueError):
+            bins[1].reweight(0.05)
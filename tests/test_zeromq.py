@@ -0,0 +1,143 @@
+import json
+import os
+import pickle
+import stat
+
+import numpy as np
+import pytest
+import zmq
+
+from westpa.work_managers.zeromq.core import (
+    OOB_BUFFER_THRESHOLD,
+    IsNode,
+    Message,
+    ZMQCore,
+    dump_message_frames,
+    load_message_frames,
+)
+
+requires_pickle5 = pytest.mark.skipif(pickle.HIGHEST_PROTOCOL < 5, reason='out-of-band buffers require pickle protocol 5')
+
+
+def large_array(order='C'):
+    '''A float64 array comfortably larger than OOB_BUFFER_THRESHOLD'''
+    n_elements = 4 * OOB_BUFFER_THRESHOLD // 8
+    return np.arange(n_elements, dtype=np.float64).reshape((n_elements // 64, 64), order=order)
+
+
+def as_received(frames):
+    '''The frames as they come off a socket with recv_multipart(copy=False)'''
+    return [zmq.Frame(frame) for frame in frames]
+
+
+class TestMessageFrames:
+    def test_small_payload(self):
+        '''Payloads with no buffers above the threshold are sent as a single pickle frame'''
+
+        payload = {'label': 'small', 'data': np.arange(16, dtype=np.float64)}
+        frames = dump_message_frames(payload)
+        assert len(frames) == 1
+
+        loaded = load_message_frames(as_received(frames))
+        assert loaded['label'] == 'small'
+        assert np.array_equal(loaded['data'], payload['data'])
+        assert loaded['data'].flags.writeable
+
+    @requires_pickle5
+    def test_large_payload(self):
+        '''Large arrays are sent as out-of-band frames, and come back equal and writeable'''
+
+        payload = {'a': large_array(), 'b': large_array(order='F'), 'small': np.ones(4)}
+        frames = dump_message_frames(payload)
+        assert len(frames) == 3
+
+        loaded = load_message_frames(as_received(frames))
+        for key in payload:
+            assert np.array_equal(loaded[key], payload[key]), key
+            assert loaded[key].flags.writeable, key
+        assert loaded['b'].flags.f_contiguous
+
+        # The received arrays do not share memory with the received frames or the original
+        loaded['a'][0, 0] = -1.0
+        assert payload['a'][0, 0] == 0.0
+
+    @requires_pickle5
+    def test_large_noncontiguous_payload(self):
+        '''Large non-contiguous arrays round-trip correctly'''
+
+        array = large_array()
+        payload = [array[:, ::3], array[::2, :].T]
+        assert not any(view.flags.c_contiguous or view.flags.f_contiguous for view in payload)
+
+        loaded = load_message_frames(as_received(dump_message_frames(payload)))
+        for (loaded_view, view) in zip(loaded, payload):
+            assert np.array_equal(loaded_view, view)
+            assert loaded_view.flags.writeable
+
+    def test_legacy_single_frame(self):
+        '''Single-frame messages, as sent before out-of-band buffers were used, can still be loaded'''
+
+        message = Message(Message.RESULT, {'data': large_array()}, master_id='master', src_id='worker')
+        frames = [pickle.dumps(message, pickle.HIGHEST_PROTOCOL)]
+
+        loaded = load_message_frames(as_received(frames))
+        assert loaded.message == Message.RESULT
+        assert (loaded.master_id, loaded.src_id) == ('master', 'worker')
+        assert np.array_equal(loaded.payload['data'], message.payload['data'])
+
+
+class TestSendMessage:
+    def test_send_recv_message(self):
+        '''Messages with large payloads survive a trip through a socket with send_message/recv_message'''
+
+        core = ZMQCore()
+        context = zmq.Context()
+        endpoint = 'inproc://{!s}'.format(core.node_id)
+        sender = context.socket(zmq.PAIR)
+        receiver = context.socket(zmq.PAIR)
+        try:
+            receiver.bind(endpoint)
+            sender.connect(endpoint)
+
+            payload = {'small': np.arange(8), 'large': large_array(), 'strided': large_array()[:, ::2]}
+            core.send_message(sender, Message.RESULT, payload)
+            message = core.recv_message(receiver, timeout=5000)
+
+            assert message.message == Message.RESULT
+            assert message.src_id == core.node_id
+            for key in payload:
+                assert np.array_equal(message.payload[key], payload[key]), key
+        finally:
+            sender.close(linger=0)
+            receiver.close(linger=0)
+            context.term()
+
+
+class HostInfoNode(ZMQCore, IsNode):
+    def __init__(self):
+        ZMQCore.__init__(self)
+        IsNode.__init__(self, n_local_workers=0)
+
+
+class TestHostInfo:
+    def test_write_host_info(self, tmp_path):
+        '''The host info file holds the downstream endpoints and has the usual umask-governed permissions'''
+
+        node = HostInfoNode()
+        node.downstream_rr_endpoint = 'tcp://*:23811'
+        node.downstream_ann_endpoint = 'tcp://*:23812'
+
+        filename = str(tmp_path / 'zmq_host_info.json')
+        old_umask = os.umask(0o022)
+        try:
+            node.write_host_info(filename)
+        finally:
+            os.umask(old_umask)
+
+        assert stat.S_IMODE(os.stat(filename).st_mode) == 0o644
+        assert os.listdir(str(tmp_path)) == ['zmq_host_info.json']
+        with open(filename, 'rt') as infofile:
+            info = json.load(infofile)
+        assert set(info) == {'rr_endpoint', 'ann_endpoint'}
+        assert info['rr_endpoint'].endswith(':23811') and '*' not in info['rr_endpoint']
+        assert node.host_info_files == [filename]